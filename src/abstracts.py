@@ -1,15 +1,41 @@
 from __future__ import annotations
 
+import queue
+import threading
 from abc import abstractmethod
-from typing import Optional
+from typing import Any, Iterable, Iterator, List, Optional, TextIO
 
 from .debbi import get_pronouns
+from .util import read_paragraphs
 
 
+# Subclasses implement stream, generate_text or both; each defaults to the
+# other. Streamed chunks carry their own separators, so joining them gives
+# the full text.
 class Generator:
-    @abstractmethod
+    def _check_overrides(self):
+        if (type(self).stream is Generator.stream and
+                type(self).generate_text is Generator.generate_text):
+            raise TypeError('{} must implement stream or generate_text'.format(
+                type(self).__name__))
+
+    def stream(self, **kwargs) -> Iterator[str]:
+        self._check_overrides()
+
+        yield self.generate_text(**kwargs)
+
     def generate_text(self, **kwargs) -> str:
-        raise NotImplementedError()
+        self._check_overrides()
+
+        return ''.join(self.stream(**kwargs))
+
+    def write_to(self, f: TextIO, **kwargs):
+        for chunk in self.stream(**kwargs):
+            f.write(chunk)
+
+    def write_to_file(self, file_name: str, **kwargs):
+        with open(file_name, 'w') as f:
+            self.write_to(f, **kwargs)
 
 
 class Processor:
@@ -17,6 +43,20 @@ class Processor:
     def process_text(self, input_text: str, **kwargs) -> str:
         raise NotImplementedError()
 
+    def process_stream(self, chunks: Iterable[str],
+                       **kwargs) -> Iterator[str]:
+        for chunk in chunks:
+            yield self.process_text(chunk, **kwargs)
+
+    # Streams the file through process_stream paragraph by paragraph, writing
+    # one output chunk per line
+    def process_file(self, input_file: str, output_file: str, **kwargs):
+        with open(output_file, 'w') as f:
+            for i, chunk in enumerate(self.process_stream(
+                    read_paragraphs(input_file), **kwargs)):
+                f.write('\n' + chunk if i else chunk)
+                f.flush()
+
     def __lshift__(self, other: Processor) -> Processor:
         if not isinstance(other, Processor):
             raise TypeError('Can only compose with objects of type Processor')
@@ -37,14 +77,108 @@ class Processor:
         return self.process_text(other)
 
 
+_END = object()
+
+
+# Puts item unless the pipeline is stopped first; False if it was
+def _put(pipe: queue.Queue, item: Any, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            pipe.put(item, timeout=.1)
+            return True
+        except queue.Full:
+            pass
+
+    return False
+
+
+def _feed(chunks: Iterator[str], pipe: queue.Queue, stop: threading.Event):
+    try:
+        for chunk in chunks:
+            if not _put(pipe, chunk, stop):
+                return
+    except BaseException as e:
+        _put(pipe, e, stop)
+    else:
+        _put(pipe, _END, stop)
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def _drain(pipe: queue.Queue, stop: threading.Event) -> Iterator[str]:
+    while not stop.is_set():
+        try:
+            item: Any = pipe.get(timeout=.1)
+        except queue.Empty:
+            continue
+
+        if item is _END:
+            return
+
+        if isinstance(item, BaseException):
+            raise item
+
+        yield item
+
+
+# Stops every stage of the pipeline once the consumer is done with it,
+# whether it finished, raised or stopped early
+def _until_done(stream: Iterator[str],
+                stop: threading.Event) -> Iterator[str]:
+    try:
+        yield from stream
+    finally:
+        stop.set()
+
+
 class ComposedProcessor(Processor):
-    def __init__(self, one: Processor, two: Processor):
+    def __init__(self, one: Processor, two: Processor,
+                 threaded: bool = False, queue_size: int = 8):
         self.one: Processor = one
         self.two: Processor = two
+        self.threaded = threaded
+        self.queue_size = queue_size
 
     def process_text(self, input_text, **kwargs):
         return self.two.process_text(self.one.process_text(input_text))
 
+    def stages(self) -> List[Processor]:
+        ret: List[Processor] = []
+
+        for stage in (self.one, self.two):
+            if isinstance(stage, ComposedProcessor):
+                ret.extend(stage.stages())
+            else:
+                ret.append(stage)
+
+        return ret
+
+    # Each stage consumes the previous one's chunks as they are produced;
+    # threaded, every stage runs on its own thread behind a bounded queue
+    def process_stream(self, chunks: Iterable[str],
+                       **kwargs) -> Iterator[str]:
+        threaded = kwargs.get('threaded', self.threaded)
+
+        stop = threading.Event()
+
+        stream: Iterator[str] = iter(chunks)
+        for stage in self.stages():
+            stream = stage.process_stream(stream)
+
+            if threaded:
+                pipe: queue.Queue = queue.Queue(self.queue_size)
+                threading.Thread(target=_feed, args=(stream, pipe, stop),
+                                 daemon=True).start()
+
+                stream = _drain(pipe, stop)
+
+        if threaded:
+            return _until_done(stream, stop)
+
+        return stream
+
 
 class Bot:
     def __init__(self, name: str, sex: Optional[str] = None):
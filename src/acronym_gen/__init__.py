@@ -1,81 +1,79 @@
 import math
 import re
-from typing import Dict, List
+from itertools import chain
+from typing import Dict, Iterator, List
 
-from datamuse import Datamuse
 from reportlab.lib.enums import TA_CENTER
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
-from tracery import Grammar
+from reportlab.platypus import Paragraph, Spacer
 from tracery.modifiers import base_english
 
 from ..abstracts import Generator, Processor
+from ..grammar import CompiledGrammar
+from ..pdf import StreamingDocTemplate
+from .prefixes import PREFIX_INDEX
 
 
 class AcronymGenerator(Generator):
     splitting_pattern = re.compile(r'[A-Z][^A-Z]*')
 
+    style = ParagraphStyle(name='Normal_CENTER',
+                           parent=getSampleStyleSheet()['Normal'],
+                           alignment=TA_CENTER)
+
     def __init__(self, acronym: str):
         self.acronym = acronym
 
-        api = Datamuse()
-
-        dictionary: Dict[str, List[str]] = {}
-
         splitted = self.splitting_pattern.findall(acronym)
 
         self.length = len(splitted)
 
-        for start in splitted:
-            res = api.words(sp='{}*'.format(start))
-
-            dictionary[start] = [obj['word'] for obj in res]
+        dictionary: Dict[str, List[str]] = {
+            start: PREFIX_INDEX().complete(start) for start in splitted}
 
-        self.grammar = Grammar(dictionary)
+        self.grammar = CompiledGrammar(dictionary)
         self.grammar.add_modifiers(base_english)
 
         self.rule = '#{}.capitalize#'.format('.capitalize# #'.join(splitted))
 
-    def generate_text(self, **kwargs) -> str:
+    def stream(self, **kwargs) -> Iterator[str]:
         length = kwargs.get('length', 50000)
 
-        return '\n'.join((self.grammar.flatten(self.rule)
-                          for _ in range(math.ceil(length / self.length))))
+        for i in range(math.ceil(length / self.length)):
+            line = self.grammar.flatten(self.rule)
+
+            yield '\n' + line if i else line
+
+    # Lays the lines out as they are generated and returns the page count
+    def write_pdf(self, file_name: str, length: int = 50000) -> int:
+        doc = StreamingDocTemplate(file_name, pagesize=letter,
+                                   rightMargin=72, leftMargin=72,
+                                   topMargin=72, bottomMargin=18)
+
+        return doc.build_stream(chain(
+            [Paragraph('<font size="18">{}</font>'.format(self.acronym),
+                       self.style),
+             Spacer(1, 12)],
+            (Paragraph(x.lstrip('\n'), self.style)
+             for x in self.stream(length=length))))
 
     def save_to_file(self, file_name: str, **kwargs):
         length = kwargs.get('length', 50000)
 
-        text = self.generate_text(length=length)
-
         if file_name.endswith('.pdf'):
-            doc = SimpleDocTemplate(file_name, pagesize=letter,
-                                    rightMargin=72, leftMargin=72,
-                                    topMargin=72, bottomMargin=18)
-
-            styles = getSampleStyleSheet()
-            styles.add(ParagraphStyle(name='Normal_CENTER',
-                                      parent=styles['Normal'],
-                                      alignment=TA_CENTER))
-
-            doc.build([Paragraph(
-                '<font size="18">{}</font>'.format(self.acronym),
-                styles['Normal_CENTER']),
-                Spacer(1, 12)] +
-                [Paragraph(p, styles['Normal_CENTER'])
-                 for p in text.split('\n')])
+            self.write_pdf(file_name, length)
         else:
-            with open(file_name, 'w') as f:
-                f.write(text)
+            self.write_to_file(file_name, length=length)
 
 
 class AcronymProcessor(Processor):
     splitting_pattern = re.compile(r'[A-Z][^A-Z]*')
 
     def __init__(self):
-        self.api = Datamuse()
+        self.index = PREFIX_INDEX()
 
-        self.grammar = Grammar({})
+        self.grammar = CompiledGrammar({})
         self.grammar.add_modifiers(base_english)
 
     def process_text(self, input_text: str, **kwargs) -> str:
@@ -83,18 +81,10 @@ class AcronymProcessor(Processor):
 
         splitted = self.splitting_pattern.findall(input_text)
 
-        dictionary: Dict[str, List[str]] = {}
-        for start in (x for x in splitted if x not in self.grammar.symbols):
-            if topics is None:
-                res = self.api.words(sp='{}*'.format(start), max=1000)
-            else:
-                res = self.api.words(
-                    sp='{}*'.format(start), topics=topics, max=1000)
-
-            dictionary[start] = [obj['word'] for obj in res]
-
-        for k, v in dictionary.items():
-            self.grammar.push_rules(k, v)
+        for start in splitted:
+            if start not in self.grammar.symbols:
+                self.grammar.push_rules(start, self.index.complete(
+                    start, max_results=1000, topics=topics))
 
         return self.grammar.flatten('#{}.capitalize#'.format(
             '.capitalize# #'.join(splitted)))
@@ -0,0 +1,129 @@
+import bisect
+import json
+import os
+import re
+from functools import lru_cache
+from os import path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..nlp import load_model
+from ..util import NLTK_CORPUS, word_vectors
+
+PREFIX_INDEX_FILE = 'data/prefix_index.json'
+PREFIX_INDEX_VERSION = 1
+
+word_pattern = re.compile(r'^[a-z][a-z-]*$')
+
+
+# Lowercase words from WordNet lemmas, the NLTK word list and the spaCy
+# vocabulary, each scored by spaCy's log probability so prefix matches come
+# back most frequent first, as Datamuse returns them
+def build_prefix_index() -> Dict[str, Any]:
+    nlp = load_model('en_core_web_lg', 'tokenizer')
+
+    candidates = set(NLTK_CORPUS('wordnet').all_lemma_names())
+    candidates.update(x.lower() for x in NLTK_CORPUS('words').words())
+    candidates.update(lex.lower_ for lex in nlp.vocab if lex.is_alpha)
+
+    words = sorted(x for x in candidates if word_pattern.match(x))
+
+    return {
+        'version': PREFIX_INDEX_VERSION,
+        'words': words,
+        'scores': [nlp.vocab[x].prob for x in words]
+    }
+
+
+def save_prefix_index(index: Dict[str, Any]):
+    tmp_name = '{}.{}.tmp'.format(PREFIX_INDEX_FILE, os.getpid())
+    with open(tmp_name, 'w') as f:
+        json.dump(index, f)
+
+    os.replace(tmp_name, PREFIX_INDEX_FILE)
+
+
+# Sorted word array searched with bisect: the words sharing a prefix form one
+# contiguous slice
+class PrefixIndex:
+    topic_pool = 1000
+
+    def __init__(self, words: Sequence[str], scores: Sequence[float]):
+        self.words = list(words)
+        self.scores = np.asarray(scores, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def span(self, prefix: str) -> Tuple[int, int]:
+        prefix = prefix.lower()
+
+        start = bisect.bisect_left(self.words, prefix)
+        end = bisect.bisect_left(self.words, prefix + '\uffff', start)
+
+        return (start, end)
+
+    # The `limit` most frequent words starting with prefix, most frequent
+    # first
+    def top(self, prefix: str, limit: int) -> List[str]:
+        start, end = self.span(prefix)
+
+        scores = self.scores[start:end]
+        if len(scores) > limit:
+            order = np.argpartition(-scores, limit)[:limit]
+        else:
+            order = np.arange(len(scores))
+
+        order = order[np.argsort(-scores[order], kind='stable')]
+
+        return [self.words[start + i] for i in order]
+
+    @lru_cache(maxsize=4096)
+    def _complete(self, prefix: str, max_results: int,
+                  topics: Optional[str]) -> Tuple[str, ...]:
+        if topics is None:
+            return tuple(self.top(prefix, max_results))
+
+        # Topics rerank a wider pool of frequent matches by similarity to
+        # the topic words, like Datamuse's topics parameter
+        words = self.top(prefix, max(max_results, self.topic_pool))
+        if len(words) == 0:
+            return ()
+
+        topic = word_vectors(topics.replace(',', ' ').split()).sum(axis=0)
+        similarity = word_vectors(words) @ topic
+
+        return tuple(words[i] for i in np.argsort(
+            -similarity, kind='stable')[:max_results])
+
+    def complete(self, prefix: str, max_results: int = 100,
+                 topics: Optional[str] = None) -> List[str]:
+        return list(self._complete(prefix.lower(), max_results, topics))
+
+
+@lru_cache()
+def PREFIX_INDEX() -> PrefixIndex:
+    if path.isfile(PREFIX_INDEX_FILE):
+        with open(PREFIX_INDEX_FILE) as f:
+            index = json.load(f)
+
+        if index.get('version') == PREFIX_INDEX_VERSION:
+            return PrefixIndex(index['words'], index['scores'])
+
+    index = build_prefix_index()
+    save_prefix_index(index)
+
+    return PrefixIndex(index['words'], index['scores'])
+
+
+def main():
+    index = build_prefix_index()
+    save_prefix_index(index)
+
+    print('Rebuilt {} with {} words'.format(
+        PREFIX_INDEX_FILE, len(index['words'])))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,63 @@
 import datetime
+import multiprocessing
 import random
 import re
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, cast
 
+import numpy as np
 from faker import Faker
-from faker.providers import address, profile
-from tracery import Grammar
+from faker.providers import address, date_time, person
 from tracery.modifiers import base_english
 from us import states
 
 from ..abstracts import Generator
 from ..shared import CleaningProcessor
 from ..debbi import get_astrological_sign, get_zodiac_sign, get_pronouns
+from ..grammar import CompiledGrammar
+
+
+# The generator owned by a pool worker, built once by _init
+_GENERATOR: Optional['AutBioGenerator'] = None
+
+
+def _init():
+    global _GENERATOR
+    _GENERATOR = AutBioGenerator()
+
+
+def _work(task: Tuple[int, int, int]) -> List[str]:
+    assert _GENERATOR is not None
+
+    return _GENERATOR.generate_batch(*task)
+
+
+@lru_cache()
+def state_name(abbr: str) -> Optional[str]:
+    state = states.lookup(abbr)
+
+    return state.name if state is not None else None
 
 
 class AutBioGenerator(Generator):
     raw_pattern = re.compile(r'^\(\((.+)\)\)$')
-    state_pattern = re.compile(r', ([A-Z]{2}) [0-9]{5}$')
+
+    # Choices draw from `rng`, the global random module unless a batch gives
+    # each record its own generator; the module's functions share one hidden
+    # Random instance
+    rng: random.Random = cast(random.Random, random)
+
+    # Uniforms drawn per record by generate_batch, padded to whole Philox
+    # blocks of four so records start on a block boundary
+    record_draws = 8
 
     def __init__(self, seed: Optional[int] = None):
         self.cleaner = CleaningProcessor()
 
         self.fake = Faker()
         self.fake.add_provider(address)
-        self.fake.add_provider(profile)
+        self.fake.add_provider(date_time)
+        self.fake.add_provider(person)
 
         if seed:
             random.seed(seed)
@@ -69,57 +103,53 @@ class AutBioGenerator(Generator):
             except AttributeError:
                 return text
 
-        self.grammar = Grammar(dictionary)
+        self.grammar = CompiledGrammar(dictionary)
         self.grammar.add_modifiers(base_english)
         self.grammar.add_modifiers({
             'raw': raw,
             'clean': lambda x: x >> self.cleaner
         })
 
-    def generate_details(self, **kwargs) -> dict:
-        details: Dict[str, Any] = {
-            'genre': random.choice(['fantasy'])
-        }
-
-        details.update(self.fake.profile(sex=None))
+    def fake_state(self) -> str:
+        name = state_name(self.fake.state_abbr())
+        while name is None:
+            name = state_name(self.fake.state_abbr())
 
-        details['pronouns'] = get_pronouns(details['sex'])
+        return name
 
-        details['is_gay'] = random.random() < .0195
-        details['is_married'] = random.random() < .43
-        details['has_kids'] = random.random() < .74
+    # Builds the fields the templates use from pre-drawn uniforms: gay,
+    # married, kids, inspired_by and the inspiring relative's sex
+    def _details(self, sex: str, draws: np.ndarray) -> dict:
+        details: Dict[str, Any] = {
+            'genre': self.rng.choice(['fantasy']),
+            'sex': sex,
+            'name': (self.fake.name_female() if sex == 'F'
+                     else self.fake.name_male()),
+            'state': self.fake_state(),
+            'pronouns': get_pronouns(sex),
+            'is_gay': draws[0] < .0195,
+            'is_married': draws[1] < .43,
+            'has_kids': draws[2] < .74
+        }
 
         if details['is_married']:
             if details['is_gay']:
                 details['spouse'] = {
                     'F': 'wife',
                     'M': 'husband'
-                }[details['sex']]
+                }[sex]
             else:
                 details['spouse'] = {
                     'F': 'husband',
                     'M': 'wife'
-                }[details['sex']]
+                }[sex]
 
-        addr = self.state_pattern.search(details['residence'])
-        while not addr:
-            details['residence'] = self.fake.address()
-
-            addr = self.state_pattern.search(details['residence'])
-
-        details['state'] = states.lookup(addr.group(1)).name
-
-        details['signs'] = {
-            'astrological': get_astrological_sign(details['birthdate']),
-            'zodiac': get_zodiac_sign(details['birthdate'])
-        }
-
-        if random.random() < .3:
+        if draws[3] < .3:
             details['inspired_by'] = {
-                'sex': random.choice(['F', 'M'])
+                'sex': 'F' if draws[4] < .5 else 'M'
             }
 
-            details['inspired_by']['relation'] = random.choice({
+            details['inspired_by']['relation'] = self.rng.choice({
                 'F': ['mother', 'sister', 'daughter'],
                 'M': ['father', 'brother', 'son']
             }[details['inspired_by']['sex']])
@@ -128,9 +158,20 @@ class AutBioGenerator(Generator):
 
         return details
 
-    def generate_text(self, **kwargs) -> str:
-        details = kwargs.get('details', self.generate_details())
+    def generate_details(self, **kwargs) -> dict:
+        details = self._details(self.rng.choice(['F', 'M']),
+                                np.array([self.rng.random()
+                                          for _ in range(5)]))
 
+        details['birthdate'] = self.fake.date_of_birth()
+        details['signs'] = {
+            'astrological': get_astrological_sign(details['birthdate']),
+            'zodiac': get_zodiac_sign(details['birthdate'])
+        }
+
+        return details
+
+    def template(self, details: dict) -> str:
         text = """
             {name} is a #cred_{genre}# #author.raw# of #good_adj# {genre} #books.raw#
             who lives in {state}
@@ -145,10 +186,67 @@ class AutBioGenerator(Generator):
         elif details['has_kids']:
             text += ' #{pronouns}kids#'
 
-        text += '.'
+        return text + '.'
 
-        print(text)
-        return self.grammar.flatten(text.format(**details)) >> self.cleaner
+    def generate_text(self, **kwargs) -> str:
+        details = kwargs.get('details')
+        if details is None:
+            details = self.generate_details()
+
+        # Name and state are filled in after expansion, so the grammar only
+        # sees a handful of distinct templates and reuses their plans
+        text = self.grammar.flatten(self.template(details).format(
+            **{**details, 'name': '{name}', 'state': '{state}'}))
+
+        # Pronoun and spouse actions push rules that tracery never pops
+        self.grammar.clear_state()
+
+        return text.format(
+            name=details['name'], state=details['state']) >> self.cleaner
+
+    # Bios start..start + count of a run. Each record's choices come from a
+    # Random seeded with (seed, index), and its uniforms from a counter-based
+    # Philox stream advanced to the record, so output does not depend on how
+    # records are split into batches
+    def generate_batch(self, start: int, count: int,
+                       seed: int) -> List[str]:
+        bit_generator = np.random.Philox(key=seed)
+        bit_generator.advance(start * self.record_draws // 4)
+
+        draws = np.random.Generator(bit_generator).random(
+            (count, self.record_draws))
+
+        texts = []
+        try:
+            for i in range(count):
+                record_seed = (seed << 32) + start + i
+
+                self.rng = self.grammar.rng = random.Random(record_seed)
+                self.fake.seed_instance(record_seed)
+
+                texts.append(self.generate_text(
+                    details=self._details('F' if draws[i, 5] < .5 else 'M',
+                                          draws[i])))
+        finally:
+            self.rng = AutBioGenerator.rng
+            self.grammar.rng = CompiledGrammar.rng
+
+        return texts
+
+    def generate_many(self, n: int, workers: int = 1,
+                      seed: Optional[int] = None,
+                      batch_size: int = 1000) -> List[str]:
+        if seed is None:
+            seed = random.getrandbits(32)
+
+        tasks = [(start, min(batch_size, n - start), seed)
+                 for start in range(0, n, batch_size)]
+
+        if workers <= 1:
+            return [x for task in tasks for x in self.generate_batch(*task)]
+
+        with multiprocessing.Pool(workers, initializer=_init) as pool:
+            return [x for texts in pool.imap(_work, tasks) for x in texts]
 
 
 def main():
@@ -0,0 +1,251 @@
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, Tuple
+
+import yaml
+
+from .util import WHITESPACE_PATTERN, word_count
+
+SAMPLE_TEXT = 'src/synonymize/hounds_sherlock.txt'
+
+
+def timed(func: Callable, *args, **kwargs) -> Tuple[float, Any]:
+    start = time.perf_counter()
+    res = func(*args, **kwargs)
+
+    return (time.perf_counter() - start, res)
+
+
+def read_sample() -> str:
+    with open(SAMPLE_TEXT) as f:
+        return f.read().replace('_', '')
+
+
+def bench_patterns():
+    from .shared import CleaningProcessor
+    from .spreadr_shreddr import load_patterns
+    from .spreadr_shreddr.patterns import PatternMatcher
+
+    with open('src/spreadr_shreddr/data.yaml', 'r') as f:
+        patterns = load_patterns(yaml.safe_load(f))
+
+    text = read_sample() >> CleaningProcessor()
+    dword_change = -word_count(text) // 10
+
+    def space(x):
+        return WHITESPACE_PATTERN.sub(' ', ' {} '.format(x))
+
+    # The per-pattern find/replace loop the matcher replaced
+    def naive(text, dword_change):
+        done: set = set()
+        while dword_change < 0 and len(done) != len(patterns):
+            done.clear()
+            for k, v in patterns.items():
+                if dword_change == 0:
+                    return text
+
+                if v == '':
+                    diff = -word_count(k)
+                else:
+                    diff = word_count(v) - word_count(k)
+
+                if (abs(dword_change - diff) < abs(dword_change) and
+                        text.find(space(k)) != -1):
+                    text = text.replace(space(k), space(v), 1)
+                    dword_change -= diff
+                else:
+                    done.add(k)
+
+        return text
+
+    def compiled(text, dword_change):
+        matcher = PatternMatcher(patterns)
+
+        while dword_change < 0:
+            (rewritten, dword_change, _) = matcher.rewrite(text, dword_change)
+
+            if rewritten == text:
+                break
+
+            text = rewritten
+
+        return text
+
+    naive_time, _ = timed(naive, text, dword_change)
+    compiled_time, _ = timed(compiled, text, dword_change)
+
+    print('patterns: {} patterns, {} words'.format(
+        len(patterns), word_count(text)))
+    print('  naive:    {:.3f}s'.format(naive_time))
+    print('  compiled: {:.3f}s (x{:.1f})'.format(
+        compiled_time, naive_time / compiled_time))
+
+
+def bench_soundor(words: int = 5000):
+    from .soundor import SoundorProcessor
+
+    text = ' '.join(read_sample().split()[:words])
+
+    processor = SoundorProcessor()
+    tokens = [x.orth_ for x in processor.nlp(text >> processor.cleaner)]
+
+    def per_token():
+        return [processor.pin.manipulate(x.lower(), temperature=.25)
+                for x in tokens if processor.eligible(x)]
+
+    per_token_time, _ = timed(per_token)
+    batched_time, _ = timed(processor.process_text, text)
+
+    print('soundor: {} tokens'.format(len(tokens)))
+    print('  per token: {:.1f} tokens/s'.format(len(tokens) / per_token_time))
+    print('  batched:   {:.1f} tokens/s'.format(len(tokens) / batched_time))
+
+
+def bench_bots(turns: int = 5000):
+    from .bots import ElizaBot
+
+    def converse(respond1, respond2):
+        text = respond1('')
+        for i in range(turns):
+            text = (respond2 if i % 2 == 0 else respond1)(text)
+
+    bot1, bot2 = ElizaBot(), ElizaBot()
+
+    linear_time, _ = timed(converse, bot1.inst.respond, bot2.inst.respond)
+    compiled_time, _ = timed(converse, bot1.respond, bot2.respond)
+
+    print('bots: Eliza vs Eliza, {} turns'.format(turns))
+    print('  linear:   {:.1f} turns/s'.format(turns / linear_time))
+    print('  compiled: {:.1f} turns/s'.format(turns / compiled_time))
+
+
+def bench_grammar(expansions: int = 20000):
+    from tracery import Grammar
+    from tracery.modifiers import base_english
+
+    from .grammar import CompiledGrammar
+
+    rules = {
+        'origin': ['#name.capitalize# met #animal.a# at #place#',
+                   '#[hero:#name#]story#'],
+        'story': ['#hero# saw #animal.s#.', '#hero.capitalize# left.'],
+        'name': ['alice', 'eve', 'ursula'],
+        'animal': ['cat', 'unicorn', 'ox'],
+        'place': ['home', 'the #animal# farm']
+    }
+
+    def expand(grammar):
+        grammar.add_modifiers(base_english)
+
+        for _ in range(expansions):
+            grammar.flatten('#origin#')
+
+    parsed_time, _ = timed(expand, Grammar(rules))
+    compiled_time, _ = timed(expand, CompiledGrammar(rules))
+
+    print('grammar: {} expansions'.format(expansions))
+    print('  parsed:   {:.1f} expansions/s'.format(expansions / parsed_time))
+    print('  compiled: {:.1f} expansions/s (x{:.1f})'.format(
+        expansions / compiled_time, parsed_time / compiled_time))
+
+
+PDF_SCRIPT = """
+import resource, time
+from src.acronym_gen import AcronymGenerator
+gen = AcronymGenerator('NaNoGenMo')
+start = time.perf_counter()
+if {streaming}:
+    pages = gen.write_pdf('{file_name}', {lines})
+else:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import Paragraph, SimpleDocTemplate
+    doc = SimpleDocTemplate('{file_name}', pagesize=letter, rightMargin=72,
+                            leftMargin=72, topMargin=72, bottomMargin=18)
+    doc.build([Paragraph(x, gen.style)
+               for x in gen.generate_text(length={lines}).split('\\n')])
+    pages = doc.page
+print(pages, time.perf_counter() - start,
+      resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+
+
+def bench_pdf(lines: int = 50000):
+    import os
+    import tempfile
+
+    print('pdf: {} words of acronym lines'.format(lines))
+
+    for name, streaming in (('list', False), ('streaming', True)):
+        fd, file_name = tempfile.mkstemp(suffix='.pdf')
+        os.close(fd)
+
+        try:
+            res = subprocess.run(
+                [sys.executable, '-c', PDF_SCRIPT.format(
+                    streaming=streaming, file_name=file_name, lines=lines)],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                universal_newlines=True)
+        finally:
+            os.remove(file_name)
+
+        if res.returncode != 0:
+            print('  {:<10} failed: {}'.format(
+                name, res.stderr.strip().splitlines()[-1]))
+            continue
+
+        pages, seconds, rss = map(float, res.stdout.split())
+        print('  {:<10} {:.1f} pages/s, peak RSS {:.1f} MB'.format(
+            name, pages / seconds, rss))
+
+
+ENTRY_POINTS = ('src.abstracts', 'src.shared', 'src.bots', 'src.soundor',
+                'src.betweenlook', 'src.acronym_gen', 'src.autbio',
+                'src.spreadr_shreddr', 'src.synonymize', 'src.charrio',
+                'src.namor.jesus', 'src.namor.sound')
+
+STARTUP_SCRIPT = """
+import resource, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start,
+      resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+
+
+def bench_startup():
+    print('startup: {:<22} {:>10} {:>12}'.format(
+        'module', 'import (s)', 'peak RSS (MB)'))
+
+    for module in ENTRY_POINTS:
+        res = subprocess.run(
+            [sys.executable, '-c', STARTUP_SCRIPT.format(module=module)],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True)
+
+        if res.returncode != 0:
+            print('  {:<22} failed: {}'.format(
+                module, res.stderr.strip().splitlines()[-1]))
+            continue
+
+        seconds, rss = map(float, res.stdout.split())
+        print('  {:<22} {:>10.3f} {:>12.1f}'.format(module, seconds, rss))
+
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    'bots': bench_bots,
+    'grammar': bench_grammar,
+    'patterns': bench_patterns,
+    'pdf': bench_pdf,
+    'soundor': bench_soundor,
+    'startup': bench_startup
+}
+
+
+def main():
+    for name in sys.argv[1:] or BENCHMARKS:
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,10 @@
-from typing import List
+from typing import Iterator
 
-from tracery import Grammar
 from tracery.modifiers import base_english
 
 from ..abstracts import Bot, Generator
 from ..bots import ElizaBot
+from ..grammar import CompiledGrammar
 from ..util import word_count
 
 
@@ -13,7 +13,7 @@ class BetweenLookGenerator(Generator):
         self.bot1 = bot1
         self.bot2 = bot2
 
-        self.grammar = Grammar({
+        self.grammar = CompiledGrammar({
             'origin': ['{quote} #name# {verb}.',
                        # '{quote} {verb} #name#',
                        '#name# {verb}, {quote}'],
@@ -24,57 +24,50 @@ class BetweenLookGenerator(Generator):
         })
         self.grammar.add_modifiers(base_english)
 
-    def generate_text(self, **kwargs):
-        length = kwargs.get('length', 50000)
-
-        history: List[str] = [self.bot1.respond('')]
-        w_count = word_count(history[0])
+    def render(self, msg: str, info: str) -> str:
+        msg = '"{}"'.format(msg)
 
-        quote = '"{}"'.format
+        msg_type = 'neutral'
+        if len(msg) >= 2:
+            if msg[-2] == '?':
+                msg_type = 'question'
 
-        second = True
-        while w_count < length:
-            if second:
-                sent = self.bot2.respond(history[-1])
-                info = self.bot2.info()
-            else:
-                sent = self.bot1.respond(history[-1])
-                info = self.bot1.info()
+            elif msg[-2] == '!':
+                msg_type = 'exclaim'
 
-            second = not second
-
-            history.append(sent)
-            w_count += word_count(sent)
+        # Only the templates go through the grammar, so their plans are
+        # cached; the quote is inserted verbatim
+        rule = self.grammar.flatten('{}#origin#'.format(info))
+        rule = rule.format(
+            quote=msg, verb=self.grammar.flatten('#{}#'.format(msg_type)))
 
-        text = ''
+        return rule[0].capitalize() + rule[1:]
 
-        for msg in history:
-            msg = quote(msg)
+    # Each line is rendered as soon as its bot has spoken, attributed to
+    # that bot
+    def stream(self, **kwargs) -> Iterator[str]:
+        length = kwargs.get('length', 50000)
 
-            msg_type = 'neutral'
-            if len(msg) >= 2:
-                if msg[-2] == '?':
-                    msg_type = 'question'
+        sent = self.bot1.respond('')
+        w_count = word_count(sent)
 
-                elif msg[-2] == '!':
-                    msg_type = 'exclaim'
+        yield self.render(sent, self.bot1.info())
 
-            rule = self.grammar.flatten('\n{}#origin#'.format(info))
-            rule = rule.format(quote=msg, verb='#{}#'.format(msg_type))
-            rule = self.grammar.flatten(rule)
+        second = True
+        while w_count < length:
+            bot = self.bot2 if second else self.bot1
+            second = not second
 
-            text += rule[0].capitalize()+rule[1:]
+            sent = bot.respond(sent)
+            w_count += word_count(sent)
 
-        return text
+            yield '\n' + self.render(sent, bot.info())
 
 
 def main():
     gen = BetweenLookGenerator(ElizaBot(), ElizaBot())
 
-    text = gen.generate_text()
-
-    with open('betweenlook.txt', 'w') as f:
-        f.write(text)
+    gen.write_to_file('betweenlook.txt')
 
 
 if __name__ == "__main__":
@@ -1,4 +1,7 @@
-from typing import Optional
+import random
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Pattern, Union
 
 from nltk.chat import Chat
 from nltk.chat.eliza import eliza_chatbot
@@ -9,15 +12,104 @@ from nltk.chat.zen import zen_chatbot
 
 from ..abstracts import Bot
 
+wildcard_pattern = re.compile(r'%(\d)')
+
+# A response split at its wildcards: literals at even positions, group
+# numbers at odd ones
+Template = List[Union[str, int]]
+
+
+def compile_template(response: str) -> Template:
+    parts: Template = wildcard_pattern.split(response)
+    parts[1::2] = [int(x) for x in parts[1::2]]
+
+    return parts
+
+
+# Dispatches a Chat's pairs with one regex: every pattern becomes a group of
+# a single alternation, tried in order like Chat.respond, and the group that
+# matched (lastindex) names the pair. Patterns that do not survive being
+# combined, e.g. because of backreferences, fall back to the linear scan.
+class CompiledChat:
+    def __init__(self, chat: Chat):
+        pairs = [(x.pattern, y) for x, y in chat._pairs]
+
+        self.reflections = chat._reflections
+        self.reflection_pattern = chat._regex
+
+        self.responses = [[compile_template(x) for x in y] for _, y in pairs]
+
+        self.linear = [x for x, _ in chat._pairs]
+
+        # Group number of each pair's wrapping group -> index of the pair
+        self.by_group: Dict[int, int] = {}
+
+        offset = 1
+        for i, (pattern, _) in enumerate(chat._pairs):
+            self.by_group[offset] = i
+            offset += pattern.groups + 1
+
+        try:
+            self.pattern: Optional[Pattern] = re.compile('|'.join(
+                '({})'.format(x) for x, _ in pairs), re.IGNORECASE)
+        except re.error:
+            self.pattern = None
+
+    @lru_cache(maxsize=4096)
+    def substitute(self, text: str) -> str:
+        return self.reflection_pattern.sub(
+            lambda x: self.reflections[x.group()], text.lower())
+
+    def render(self, template: Template, match, offset: int) -> str:
+        resp = ''.join(
+            self.substitute(match.group(offset + x) or '')
+            if isinstance(x, int) else x
+            for x in template)
+
+        # Same punctuation fixes as Chat.respond
+        if resp[-2:] == '?.':
+            resp = resp[:-2] + '.'
+        if resp[-2:] == '??':
+            resp = resp[:-2] + '?'
+
+        return resp
+
+    def respond(self, text: str) -> Optional[str]:
+        if self.pattern is not None:
+            match = self.pattern.match(text)
+            if match is None or match.lastindex is None:
+                return None
+
+            i = self.by_group[match.lastindex]
+
+            return self.render(
+                random.choice(self.responses[i]), match, match.lastindex)
+
+        for i, pattern in enumerate(self.linear):
+            match = pattern.match(text)
+
+            if match:
+                return self.render(random.choice(self.responses[i]), match, 0)
+
+        return None
+
+
+@lru_cache()
+def compile_chat(chat: Chat) -> CompiledChat:
+    return CompiledChat(chat)
+
 
 class NLTKBot(Bot):
     def __init__(self, name: str, inst: Chat, sex: Optional[str] = None):
         Bot.__init__(self, name, sex)
 
         self.inst = inst
+        self.chat = compile_chat(inst)
 
+    # Like Chat.respond, but an unmatched input gets an empty reply rather
+    # than None, so conversations can carry on
     def respond(self, text: str, **kwargs) -> str:
-        return self.inst.respond(text)
+        return self.chat.respond(text) or ''
 
 
 def ElizaBot():
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from os import path
+from typing import Any, Dict, Iterator, Optional
+
+
+@contextmanager
+def transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    else:
+        conn.execute('COMMIT')
+
+
+# Values are stored as JSON in a SQLite database in WAL mode, so several
+# processes can share one cache file. Reads only take a write transaction
+# every `access_interval` hits, to record their access times in one batch.
+class PersistentCache:
+    eviction_interval = 1000
+    access_interval = 1000
+
+    def __init__(self, file_name: str, max_entries: Optional[int] = None,
+                 ttl: Optional[float] = None):
+        self.file_name = file_name
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._writes = 0
+        self._accessed: Dict[str, float] = {}
+
+        directory = path.dirname(file_name)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(
+            file_name, timeout=60, isolation_level=None,
+            check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+
+        with transaction(self.conn):
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'created REAL NOT NULL, accessed REAL NOT NULL)')
+            self.conn.execute(
+                'CREATE INDEX IF NOT EXISTS entries_accessed '
+                'ON entries (accessed)')
+
+    @staticmethod
+    def make_key(*args, **kwargs) -> str:
+        return hashlib.sha1(json.dumps(
+            [args, kwargs], sort_keys=True).encode('utf-8')).hexdigest()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+
+        row = self.conn.execute(
+            'SELECT value, created FROM entries WHERE key = ?',
+            (key,)).fetchone()
+
+        if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+            self.misses += 1
+            return default
+
+        self.hits += 1
+
+        self._accessed[key] = now
+        if len(self._accessed) >= self.access_interval:
+            self.flush()
+
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        now = time.time()
+
+        with transaction(self.conn):
+            self.conn.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)',
+                (key, json.dumps(value), now, now))
+
+            self._writes += 1
+            if self._writes % self.eviction_interval == 0:
+                self._evict(now)
+
+    def _flush_accessed(self):
+        if len(self._accessed) > 0:
+            self.conn.executemany(
+                'UPDATE entries SET accessed = ? WHERE key = ?',
+                ((v, k) for k, v in self._accessed.items()))
+
+            self._accessed.clear()
+
+    def flush(self):
+        with transaction(self.conn):
+            self._flush_accessed()
+
+    def __contains__(self, key: str) -> bool:
+        row = self.conn.execute(
+            'SELECT created FROM entries WHERE key = ?', (key,)).fetchone()
+
+        return row is not None and (
+            self.ttl is None or time.time() - row[0] <= self.ttl)
+
+    def __len__(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def _evict(self, now: float):
+        self._flush_accessed()
+
+        if self.ttl is not None:
+            self.evictions += self.conn.execute(
+                'DELETE FROM entries WHERE created < ?',
+                (now - self.ttl,)).rowcount
+
+        if self.max_entries is not None:
+            excess = len(self) - self.max_entries
+
+            if excess > 0:
+                self.evictions += self.conn.execute(
+                    'DELETE FROM entries WHERE key IN (SELECT key FROM entries'
+                    ' ORDER BY accessed LIMIT ?)', (excess,)).rowcount
+
+    def evict(self):
+        with transaction(self.conn):
+            self._evict(time.time())
+
+    def clear(self):
+        with transaction(self.conn):
+            self.conn.execute('DELETE FROM entries')
+
+        self._accessed.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self)
+        }
+
+    def close(self):
+        self.flush()
+        self.conn.close()
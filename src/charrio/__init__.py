@@ -1,9 +1,13 @@
 import datetime
 import random
+from typing import Optional
 
-from ..debbi import (get_astrological_sign, get_astrological_traits, get_tarot_cards,
-                     get_zodiac_sign)
-from ..namor import Namor
+import numpy as np
+
+from ..debbi import (SIGNS, ZODIAC_SIGNS, get_astrological_sign,
+                     get_astrological_signs, get_astrological_traits,
+                     get_tarot_cards, get_zodiac_sign, get_zodiac_signs)
+from ..namor.abstracts import Namor
 
 
 class Charrio:
@@ -11,8 +15,8 @@ class Charrio:
         self.namer = namer
 
     def generate_character(self, max_age: int):
-        birthdate = datetime.date(datetime.datetime.now().year -
-                                  random.choice(range(max_age)))
+        birthdate = datetime.date.today() - datetime.timedelta(
+            days=random.randrange(max_age * 365))
         ret: dict = {'sex': random.choice(['F', 'M'])}
 
         astrological = get_astrological_sign(birthdate)
@@ -26,3 +30,53 @@ class Charrio:
         })
 
         return ret
+
+    # The same fields as generate_character for n characters, one column
+    # each; traits are left to get_astrological_traits of the sign column
+    def generate_cast(self, n: int, max_age: int,
+                      seed: Optional[int] = None) -> np.recarray:
+        rng = np.random.RandomState(seed)
+
+        sexes = np.where(rng.random_sample(n) < .5, 'F', 'M')
+        birthdates = (np.datetime64(datetime.date.today(), 'D') -
+                      rng.randint(0, max_age * 365, n))
+
+        astrological = get_astrological_signs(birthdates)
+
+        first_names = np.empty(n, dtype=object)
+        last_names = np.empty(n, dtype=object)
+        tarots = np.empty(n, dtype=object)
+
+        for sex in ('F', 'M'):
+            rows = np.flatnonzero(sexes == sex)
+            names = self.namer.generate_names(sex, len(rows))
+
+            first_names[rows] = [x[0] for x in names]
+            last_names[rows] = [x[1] for x in names]
+
+        for i, sign in enumerate(SIGNS):
+            rows = np.flatnonzero(astrological == i)
+            cards = get_tarot_cards(sign)
+
+            tarots[rows] = [
+                cards[x] for x in rng.randint(len(cards), size=len(rows))]
+
+        return np.rec.fromarrays([
+            sexes,
+            first_names.astype(str),
+            last_names.astype(str),
+            birthdates,
+            np.array(ZODIAC_SIGNS)[get_zodiac_signs(birthdates)],
+            np.array(SIGNS)[astrological],
+            tarots.astype(str)
+        ], names=['sex', 'first_name', 'last_name', 'birthdate', 'zodiac',
+                  'astrological', 'tarot'])
+
+
+def save_cast(cast: np.recarray, file_name: str):
+    np.save(file_name, cast, allow_pickle=False)
+
+
+def load_cast(file_name: str, mmap: bool = False) -> np.recarray:
+    return np.load(file_name, mmap_mode='r' if mmap else None,
+                   allow_pickle=False).view(np.recarray)
@@ -1,27 +1,46 @@
-import csv
 import datetime
-import re
-from collections import defaultdict
+import hashlib
+import json
+import os
 from functools import lru_cache
-from typing import DefaultDict, Dict, List, Optional
+from os import path
+from typing import Any, Dict, List, Optional
 
-import nltk
-import pycorpora
-from faker.providers.person.en import Provider
-from nltk.corpus import names
+import numpy as np
 
-from ..util import word_similarity
+from ..util import word_vectors
+from .names import (FIRST_NAMES_FEMALE, FIRST_NAMES_MALE, LAST_NAMES,
+                    NAMES_MEANING, get_name_meanings, get_names)
+
+__all__ = [
+    'ASTROLOGICAL', 'ASTROLOGICAL_TABLE', 'CORPUS', 'FIRST_NAMES_FEMALE',
+    'FIRST_NAMES_MALE', 'LAST_NAMES', 'NAMES_MEANING', 'SIGNS', 'TAROT_TABLE',
+    'TAROT_KEYWORDS', 'ZODIAC', 'ZODIAC_SIGNS', 'get_astrological_sign',
+    'get_astrological_signs', 'get_astrological_traits', 'get_name_meanings',
+    'get_names', 'get_pronouns', 'get_tarot_cards', 'get_tarot_keywords',
+    'get_zodiac_sign', 'get_zodiac_signs'
+]
+
+
+@lru_cache()
+def CORPUS(category: str, name: str) -> dict:
+    import pycorpora
+
+    return pycorpora.get_file(category, name)
 
 
 def get_pronouns(sex: Optional[str]) -> str:
     return {
         'F': '[They:she][Them:her][Their:her][Theirs:hers]',
         'M': '[They:he][Them:him][Their:his][Theirs:his]'
-    }.get(details['sex'],
+    }.get(sex or '',
           '[They:they][Them:them][Their:their][Theirs:theirs]')
 
 
-@lru_cache()
+SIGNS = ('aries', 'taurus', 'gemini', 'cancer', 'leo', 'virgo', 'libra',
+         'scorpio', 'sagittarius', 'capricorn', 'aquarius', 'pisces')
+
+
 def ASTROLOGICAL(day):
     return {
         1: 'capricorn' if day < 20 else 'aquarius',
@@ -39,8 +58,31 @@ def ASTROLOGICAL(day):
     }
 
 
+# Index into SIGNS for every (month, day), so signs for whole arrays of
+# birthdates are one fancy-indexing lookup
+def astrological_table() -> np.ndarray:
+    table = np.zeros((13, 32), dtype=np.int8)
+
+    for day in range(1, 32):
+        for month, sign in ASTROLOGICAL(day).items():
+            table[month, day] = SIGNS.index(sign)
+
+    return table
+
+
+ASTROLOGICAL_TABLE = astrological_table()
+
+
 def get_astrological_sign(birthdate: datetime.date) -> str:
-    return ASTROLOGICAL(birthdate.day)[birthdate.month]
+    return SIGNS[ASTROLOGICAL_TABLE[birthdate.month, birthdate.day]]
+
+
+# Indices into SIGNS for an array of datetime64[D] birthdates
+def get_astrological_signs(birthdates: np.ndarray) -> np.ndarray:
+    months = birthdates.astype('datetime64[M]')
+    days = (birthdates - months).astype(int) + 1
+
+    return ASTROLOGICAL_TABLE[months.astype(int) % 12 + 1, days]
 
 
 ZODIAC = {
@@ -58,109 +100,127 @@ ZODIAC = {
     11: 'pig'
 }
 
+ZODIAC_SIGNS = tuple(ZODIAC[i] for i in range(12))
+
 
 def get_zodiac_sign(birthdate: datetime.date) -> str:
-    return ZODIAC[(birthdate.year - 1900) % 12]
+    return ZODIAC_SIGNS[(birthdate.year - 1900) % 12]
+
+
+# Indices into ZODIAC_SIGNS for an array of datetime64[D] birthdates
+def get_zodiac_signs(birthdates: np.ndarray) -> np.ndarray:
+    years = birthdates.astype('datetime64[Y]').astype(int) + 1970
+
+    return (years - 1900) % 12
 
 
 @lru_cache()
 def get_astrological_traits(astrological_sign: str) -> List[str]:
-    return pycorpora.get_file('divination', 'zodiac')[
+    return CORPUS('divination', 'zodiac')[
         'western_zodiac'][astrological_sign.capitalize()]['keywords']
 
 
-ASTRO_TAROT: DefaultDict[str, List[str]] = defaultdict(list)
+TAROT_TABLE_FILE = 'data/tarot_affinity.json'
+TAROT_TABLE_VERSION = 1
 
 
-@lru_cache()
-def get_tarot_cards(astrological_sign: str) -> List[str]:
-    if len(ASTRO_TAROT) == 0:
-        tarots = pycorpora.get_file('divination', 'tarot_interpretations')[
-            'tarot_interpretations']
-        for tarot in tarots:
-            signs: Dict[str, float] = {}
-            for sign, traits in zip(ZODIAC.values(), map(
-                    get_astrological_traits, ZODIAC.values())):
-                keywords = get_tarot_keywords(tarot['name'])
+def tarot_corpus_hash() -> str:
+    tarots = CORPUS('divination', 'tarot_interpretations')[
+        'tarot_interpretations']
 
-                avg: float = 0
-                for keyword in keywords:
-                    avg += sum(map(
-                        lambda x: word_similarity(keyword, x), traits))
-                avg /= len(keywords)
+    return hashlib.sha1(json.dumps([
+        TAROT_TABLE_VERSION,
+        [(x['name'], x['keywords']) for x in tarots],
+        [get_astrological_traits(sign) for sign in SIGNS]
+    ], sort_keys=True).encode('utf-8')).hexdigest()
 
-                signs[sign] = avg
 
-            ASTRO_TAROT[min(signs.items(), key=lambda x: x[1])[0]] = tarot
+def build_tarot_table() -> Dict[str, Any]:
+    tarots = CORPUS('divination', 'tarot_interpretations')[
+        'tarot_interpretations']
+    traits = [get_astrological_traits(sign) for sign in SIGNS]
 
-    return ASTRO_TAROT[astrological_sign]
+    words = sorted({w for x in tarots for w in x['keywords']} |
+                   {w for x in traits for w in x})
+    index = {w: i for i, w in enumerate(words)}
 
+    # Mean keyword row per card and summed trait column per sign, so the
+    # whole affinity table is a single product over the similarity matrix
+    keywords = np.zeros((len(tarots), len(words)))
+    for i, tarot in enumerate(tarots):
+        for keyword in tarot['keywords']:
+            keywords[i, index[keyword]] += 1 / len(tarot['keywords'])
 
-tarot_keywords = {x['name']: x['keywords'] for x in pycorpora.get_file(
-    'divination', 'tarot_interpretations')['tarot_interpretations']}
+    sign_traits = np.zeros((len(words), len(SIGNS)))
+    for j, sign_trait in enumerate(traits):
+        for trait in sign_trait:
+            sign_traits[index[trait], j] += 1
 
+    vectors = word_vectors(words)
+    affinity = keywords @ (vectors @ vectors.T) @ sign_traits
 
-@lru_cache()
-def get_tarot_keywords(tarot_card: str) -> List[str]:
-    return tarot_keywords[tarot_card]
+    signs: Dict[str, List[str]] = {sign: [] for sign in SIGNS}
+    for tarot, sign in zip(tarots, affinity.argmin(axis=1)):
+        signs[SIGNS[sign]].append(tarot['name'])
 
+    for j, sign in enumerate(SIGNS):
+        if len(signs[sign]) == 0:
+            signs[sign].append(tarots[affinity[:, j].argmin()]['name'])
 
-nltk.download('names')
+    return {
+        'version': TAROT_TABLE_VERSION,
+        'corpus': tarot_corpus_hash(),
+        'signs': signs,
+        'cards': [x['name'] for x in tarots],
+        'affinity': affinity.tolist()
+    }
 
-FIRST_NAMES_FEMALE = frozenset(
-    names.words('female.txt') +
-    list(Provider.first_names_female))
 
-FIRST_NAMES_MALE = frozenset(
-    names.words('male.txt') +
-    list(Provider.first_names_male))
+def save_tarot_table(table: Dict[str, Any]):
+    tmp_name = '{}.{}.tmp'.format(TAROT_TABLE_FILE, os.getpid())
+    with open(tmp_name, 'w') as f:
+        json.dump(table, f)
 
-LAST_NAMES = frozenset(Provider.last_names)
+    os.replace(tmp_name, TAROT_TABLE_FILE)
 
 
-def name_meanings():
-    ret: Dict[str, List[str]] = {}
+@lru_cache()
+def TAROT_TABLE() -> Dict[str, Any]:
+    if path.isfile(TAROT_TABLE_FILE):
+        with open(TAROT_TABLE_FILE) as f:
+            table = json.load(f)
 
-    with open('data/names.csv') as csvfile:
-        name_pattern = re.compile(
-            r'(Pet form|From|Form|See|Dim\.) (of )?(the name )?([A-Z]+)( (or|&) ([A-Z]+))?')
-        names_reader = csv.reader(csvfile)
+        if (table.get('version') == TAROT_TABLE_VERSION and
+                table.get('corpus') == tarot_corpus_hash()):
+            return table
 
-        for row in names_reader:
-            name = row[0].lower().capitalize()
+    table = build_tarot_table()
+    save_tarot_table(table)
 
-            ret[name] = [row[1]]
+    return table
 
-            if len(row) > 2 and row[2] != '':
-                ret[name].append(row[2])
 
-        for name in ret:
-            for i, meaning in enumerate(ret[name]):
-                match = name_pattern.match(meaning)
+def get_tarot_cards(astrological_sign: str) -> List[str]:
+    return TAROT_TABLE()['signs'][astrological_sign]
 
-                if match:
-                    try:
-                        new = ret[match.group(4).lower().capitalize()]
-                    except KeyError:
-                        continue
 
-                    ret[name][i] = new[0]
+@lru_cache()
+def TAROT_KEYWORDS() -> Dict[str, List[str]]:
+    return {x['name']: x['keywords'] for x in CORPUS(
+        'divination', 'tarot_interpretations')['tarot_interpretations']}
 
-                    if len(new) > 1:
-                        ret[name].extend(new[1:])
 
-                    if match.group(7):
-                        try:
-                            new = ret[match.group(7).lower().capitalize()]
-                        except KeyError:
-                            continue
+def get_tarot_keywords(tarot_card: str) -> List[str]:
+    return TAROT_KEYWORDS()[tarot_card]
 
-                        ret[name][i] = new[0]
 
-                        if len(new) > 1:
-                            ret[name].extend(new[1:])
+def main():
+    table = build_tarot_table()
+    save_tarot_table(table)
 
-    return ret
+    print('Rebuilt {} for {} cards'.format(
+        TAROT_TABLE_FILE, len(table['cards'])))
 
 
-NAMES_MEANING: Dict[str, List[str]] = name_meanings()
+if __name__ == "__main__":
+    main()
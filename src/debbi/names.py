@@ -0,0 +1,213 @@
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from functools import lru_cache
+from os import path
+from typing import Dict, FrozenSet, List, Optional, Set
+
+from ..cache import transaction
+from ..util import NLTK_CORPUS
+
+NAMES_FILE = 'data/names.csv'
+NAMES_INDEX_FILE = 'data/names.sqlite3'
+NAMES_INDEX_VERSION = 1
+
+name_pattern = re.compile(
+    r'(Pet form|From|Form|See|Dim\.) (of )?(the name )?([A-Z]+)( (or|&) ([A-Z]+))?')
+
+
+@lru_cache()
+def FIRST_NAMES_FEMALE() -> FrozenSet[str]:
+    from faker.providers.person.en import Provider
+
+    return frozenset(NLTK_CORPUS('names').words('female.txt') +
+                     list(Provider.first_names_female))
+
+
+@lru_cache()
+def FIRST_NAMES_MALE() -> FrozenSet[str]:
+    from faker.providers.person.en import Provider
+
+    return frozenset(NLTK_CORPUS('names').words('male.txt') +
+                     list(Provider.first_names_male))
+
+
+@lru_cache()
+def LAST_NAMES() -> FrozenSet[str]:
+    from faker.providers.person.en import Provider
+
+    return frozenset(Provider.last_names)
+
+
+def names_hash() -> str:
+    with open(NAMES_FILE, 'rb') as f:
+        return hashlib.sha1(
+            str(NAMES_INDEX_VERSION).encode('utf-8') + f.read()).hexdigest()
+
+
+def name_meanings() -> Dict[str, List[str]]:
+    raw: Dict[str, List[str]] = {}
+
+    with open(NAMES_FILE) as csvfile:
+        for row in csv.reader(csvfile):
+            name = row[0].lower().capitalize()
+
+            raw[name] = [row[1]]
+
+            if len(row) > 2 and row[2] != '':
+                raw[name].append(row[2])
+
+    ret: Dict[str, List[str]] = {}
+
+    # References such as "Pet form of X" are followed until they reach
+    # actual meanings; a name caught in a cycle keeps its own text
+    def resolve(name: str, seen: Set[str]) -> List[str]:
+        if name in ret:
+            return ret[name]
+
+        meanings: List[str] = []
+        for meaning in raw[name]:
+            match = name_pattern.match(meaning)
+
+            refs = []
+            if match:
+                refs = [x.lower().capitalize()
+                        for x in (match.group(4), match.group(7))
+                        if x and x.lower().capitalize() in raw and
+                        x.lower().capitalize() not in seen]
+
+            if len(refs) == 0:
+                meanings.append(meaning)
+
+            for ref in refs:
+                meanings.extend(resolve(ref, seen | {name}))
+
+        meanings = list(dict.fromkeys(meanings))
+
+        if len(seen) == 0:
+            ret[name] = meanings
+
+        return meanings
+
+    for name in raw:
+        resolve(name, set())
+
+    return ret
+
+
+def build_name_index(file_name: str = NAMES_INDEX_FILE):
+    female = FIRST_NAMES_FEMALE()
+    male = FIRST_NAMES_MALE()
+
+    def sex(name: str) -> str:
+        if name in female:
+            return 'F'
+
+        if name in male:
+            return 'M'
+
+        return ''
+
+    tmp_name = '{}.{}.tmp'.format(file_name, os.getpid())
+    if path.isfile(tmp_name):
+        os.remove(tmp_name)
+
+    conn = sqlite3.connect(tmp_name, isolation_level=None)
+    with transaction(conn):
+        conn.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+        conn.execute(
+            'CREATE TABLE names (name TEXT PRIMARY KEY, initial TEXT, '
+            'sex TEXT, meanings TEXT) WITHOUT ROWID')
+        conn.execute(
+            'CREATE INDEX names_initial_sex ON names (initial, sex, name)')
+
+        conn.executemany('INSERT INTO names VALUES (?, ?, ?, ?)', (
+            (k, k[0], sex(k), json.dumps(v))
+            for k, v in name_meanings().items()))
+
+        conn.execute('INSERT INTO meta VALUES (?, ?)',
+                     ('hash', names_hash()))
+
+    conn.execute('VACUUM')
+    conn.close()
+
+    os.replace(tmp_name, file_name)
+
+
+# SQLite connections must not cross a fork, so each process opens its own
+def NAMES_INDEX() -> sqlite3.Connection:
+    return _names_index(os.getpid())
+
+
+@lru_cache()
+def _names_index(pid: int) -> sqlite3.Connection:
+    if path.isfile(NAMES_INDEX_FILE):
+        conn = sqlite3.connect(NAMES_INDEX_FILE, check_same_thread=False)
+
+        row = conn.execute(
+            "SELECT value FROM meta WHERE key = 'hash'").fetchone()
+        if row is not None and row[0] == names_hash():
+            conn.execute('PRAGMA mmap_size=67108864')
+            return conn
+
+        conn.close()
+
+    build_name_index()
+
+    conn = sqlite3.connect(NAMES_INDEX_FILE, check_same_thread=False)
+    conn.execute('PRAGMA mmap_size=67108864')
+
+    return conn
+
+
+@lru_cache(maxsize=4096)
+def get_name_meanings(name: str) -> List[str]:
+    row = NAMES_INDEX().execute(
+        'SELECT meanings FROM names WHERE name = ?', (name,)).fetchone()
+
+    if row is None:
+        raise KeyError(name)
+
+    return json.loads(row[0])
+
+
+@lru_cache()
+def get_names(initial: Optional[str] = None,
+              sex: Optional[str] = None) -> List[str]:
+    clauses = []
+    params = []
+
+    if initial is not None:
+        clauses.append('initial = ?')
+        params.append(initial.upper())
+
+    if sex is not None:
+        clauses.append('sex = ?')
+        params.append(sex)
+
+    query = 'SELECT name FROM names'
+    if len(clauses) > 0:
+        query += ' WHERE ' + ' AND '.join(clauses)
+
+    return [row[0] for row in NAMES_INDEX().execute(
+        query + ' ORDER BY name', params)]
+
+
+@lru_cache()
+def NAMES_MEANING() -> Dict[str, List[str]]:
+    return {row[0]: json.loads(row[1]) for row in NAMES_INDEX().execute(
+        'SELECT name, meanings FROM names ORDER BY name')}
+
+
+def main():
+    build_name_index()
+
+    print('Rebuilt {} with {} names'.format(
+        NAMES_INDEX_FILE, len(get_names())))
+
+
+if __name__ == "__main__":
+    main()
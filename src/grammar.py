@@ -0,0 +1,155 @@
+import random
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple, Union, cast
+
+from tracery import Grammar, parse, parse_tag
+
+# Section types of tracery.parse
+TEXT = 0
+TAG = 1
+ACTION = 2
+
+# Action kinds, as in tracery.NodeAction
+PUSH = 0
+POP = 1
+RUN = 2
+
+modifier_pattern = re.compile(r'\(([^)]+)\)')
+
+Action = Tuple[int, str, Optional[Tuple[str, ...]]]
+Modifier = Tuple[str, Tuple[str, ...]]
+
+
+# Steps of a compiled rule
+class TextStep(NamedTuple):
+    text: str
+
+
+class TagStep(NamedTuple):
+    symbol: Optional[str]
+    modifiers: Tuple[Modifier, ...]
+    preactions: Tuple[Action, ...]
+
+
+class ActionStep(NamedTuple):
+    action: Action
+
+
+Step = Union[TextStep, TagStep, ActionStep]
+
+
+def compile_action(raw: str) -> Action:
+    sections = raw.split(':')
+
+    if len(sections) == 1:
+        return (RUN, sections[0], None)
+
+    if sections[1] == 'POP':
+        return (POP, sections[0], None)
+
+    return (PUSH, sections[0], tuple(sections[1].split(',')))
+
+
+def compile_modifier(raw: str) -> Modifier:
+    if raw.find('(') > 0:
+        matches = modifier_pattern.findall(raw)
+
+        if len(matches) > 0:
+            return (raw[:raw.find('(')], tuple(matches[0].split(',')))
+
+    return (raw, ())
+
+
+# Parses a rule into a tuple of steps once; plans are immutable, so one
+# cache serves every grammar
+@lru_cache(maxsize=65536)
+def compile_rule(rule: str) -> Tuple[Tuple[Step, ...], Tuple[str, ...]]:
+    sections, errors = parse(rule)
+
+    steps: List[Step] = []
+    for section in sections:
+        if section['type'] == TEXT:
+            steps.append(TextStep(section['raw']))
+        elif section['type'] == TAG:
+            parsed = parse_tag(section['raw'])
+
+            steps.append(TagStep(
+                parsed['symbol'],
+                tuple(compile_modifier(x) for x in parsed['modifiers']),
+                tuple(compile_action(x['raw'])
+                      for x in parsed['preactions'])))
+        else:
+            steps.append(ActionStep(compile_action(section['raw'])))
+
+    return (tuple(steps), tuple(errors))
+
+
+def clear_escape_chars(text: str) -> str:
+    return text.replace('\\\\', 'DOUBLEBACKSLASH').replace(
+        '\\', '').replace('DOUBLEBACKSLASH', '\\')
+
+
+# Tracery grammar that expands rules from cached plans instead of building
+# a node tree for every flatten. Rule selection, actions and modifiers
+# behave as in tracery 0.1.1, drawing from `rng` (the global random module
+# unless an instance is given its own generator) in the same order.
+class CompiledGrammar(Grammar):
+    # The module's functions share one hidden Random instance
+    rng: random.Random = cast(random.Random, random)
+
+    def _activate(self, action: Action):
+        kind, target, rules = action
+
+        if kind == PUSH:
+            self.push_rules(target, [self._expand(x) for x in rules or ()])
+        elif kind == POP:
+            self.pop_rules(target)
+        else:
+            self.flatten(target, True)
+
+    def _expand_tag(self, step: TagStep) -> str:
+        for action in step.preactions:
+            self._activate(action)
+
+        if step.symbol in self.symbols:
+            text = self._expand(self.rng.choice(
+                self.symbols[step.symbol].stack[-1].default_rules))
+        else:
+            text = '(({}))'.format(step.symbol)
+
+        for name, params in step.modifiers:
+            mod = self.modifiers.get(name, None)
+
+            if mod is None:
+                text += '((.' + name + '))'
+            else:
+                text = mod(text, *params)
+
+        return text
+
+    def _expand(self, rule: str) -> str:
+        steps, _ = compile_rule(rule)
+
+        parts = []
+        for step in steps:
+            if isinstance(step, TextStep):
+                parts.append(step.text)
+            elif isinstance(step, TagStep):
+                parts.append(self._expand_tag(step))
+            else:
+                self._activate(step.action)
+
+        return ''.join(parts)
+
+    def flatten(self, rule: str, allow_escape_chars: bool = False) -> str:
+        text = self._expand(rule)
+
+        errors = compile_rule(rule)[1]
+        if len(errors) > 0:
+            self.errors.extend(errors)
+
+        if not allow_escape_chars:
+            text = clear_escape_chars(text)
+
+        return text
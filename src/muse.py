@@ -0,0 +1,186 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Dict, Iterable, List, Optional
+
+import requests
+from datamuse import Datamuse
+from datamuse.datamuse import WORD_PARAMS
+from requests.adapters import HTTPAdapter
+
+from .cache import PersistentCache
+
+DATAMUSE_API_ROOT = 'https://api.datamuse.com'
+
+
+# SQLite connections, sessions and thread pools must not cross a fork, so
+# each process gets its own cache and client
+def DATAMUSE_CACHE() -> PersistentCache:
+    return _datamuse_cache(os.getpid())
+
+
+@lru_cache()
+def _datamuse_cache(pid: int) -> PersistentCache:
+    return PersistentCache('cache/datamuse.sqlite3', max_entries=1000000)
+
+
+# Datamuse client whose responses go through the persistent cache. Requests
+# share one keep-alive session; the async API runs them on a thread pool with
+# at most `concurrency` in flight, no more than `rate_limit` per second, and
+# identical in-flight queries merged into one request. The cache is only
+# touched from the calling thread or the event loop.
+class CachedDatamuse(Datamuse):
+    def __init__(self, max_results: int = 100,
+                 cache: Optional[PersistentCache] = None,
+                 api_root: Optional[str] = None, concurrency: int = 8,
+                 rate_limit: Optional[float] = None, timeout: float = 30):
+        Datamuse.__init__(self, max_results)
+
+        if api_root is not None:
+            self.api_root = api_root.rstrip('/')
+
+        self.cache = cache if cache is not None else DATAMUSE_CACHE()
+        self.concurrency = concurrency
+        self.rate_limit = rate_limit
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._next_slot = 0.
+
+    def _fetch(self, endpoint: str, **kwargs) -> Any:
+        response = self.session.get(
+            '/'.join([self.api_root, endpoint]), params=kwargs,
+            timeout=self.timeout)
+        response.raise_for_status()
+
+        return response.json()
+
+    def _get_resource(self, endpoint, **kwargs):
+        key = self.cache.make_key(endpoint, **kwargs)
+
+        res = self.cache.get(key)
+        if res is None:
+            res = self._fetch(endpoint, **kwargs)
+
+            self.cache.set(key, res)
+
+        return res
+
+    # Semaphores and futures belong to one event loop, so they are rebuilt
+    # whenever the client is used from a new one
+    def _bind(self):
+        loop = asyncio.get_event_loop()
+
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._inflight = {}
+            self._next_slot = 0.
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.concurrency)
+
+        return loop
+
+    async def _throttle(self, loop: asyncio.AbstractEventLoop):
+        if self.rate_limit is None:
+            return
+
+        now = loop.time()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1 / self.rate_limit
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _request(self, key: str, endpoint: str, kwargs: dict) -> Any:
+        loop = self._bind()
+        assert self._semaphore is not None
+
+        async with self._semaphore:
+            await self._throttle(loop)
+
+            res = await loop.run_in_executor(
+                self._executor, partial(self._fetch, endpoint, **kwargs))
+
+        self.cache.set(key, res)
+
+        return res
+
+    async def get_resource_async(self, endpoint: str, **kwargs) -> Any:
+        key = self.cache.make_key(endpoint, **kwargs)
+
+        res = self.cache.get(key)
+        if res is not None:
+            return res
+
+        self._bind()
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self._request(key, endpoint, kwargs))
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        return await asyncio.shield(future)
+
+    async def words_async(self, **kwargs) -> List[Dict[str, Any]]:
+        self._validate_args(kwargs, WORD_PARAMS)
+        if 'max' not in kwargs:
+            kwargs.update({'max': self.max})
+
+        return await self.get_resource_async('words', **kwargs)
+
+    async def words_batch(self, queries: Iterable[Dict[str, Any]],
+                          return_exceptions: bool = False) -> List[Any]:
+        return await asyncio.gather(
+            *(self.words_async(**query) for query in queries),
+            return_exceptions=return_exceptions)
+
+    # Blocking front end to words_batch; must not be called from a running
+    # event loop
+    def words_many(self, queries: Iterable[Dict[str, Any]],
+                   return_exceptions: bool = False) -> List[Any]:
+        queries = list(queries)
+
+        if len(queries) == 0:
+            return []
+
+        return asyncio.run(self.words_batch(queries, return_exceptions))
+
+    # Issues every lookup for a corpus up front so later words() calls are
+    # cache hits. Failed lookups are left for words() to retry; returns the
+    # number of distinct queries that succeeded
+    def prefetch(self, words: Iterable[str], param: str = 'ml',
+                 **kwargs) -> int:
+        res = self.words_many(({param: x, **kwargs}
+                               for x in dict.fromkeys(words)), True)
+
+        return sum(not isinstance(x, BaseException) for x in res)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+        self.session.close()
+
+
+def DATAMUSE() -> CachedDatamuse:
+    return _datamuse(os.getpid())
+
+
+@lru_cache()
+def _datamuse(pid: int) -> CachedDatamuse:
+    return CachedDatamuse(
+        api_root=os.environ.get('DATAMUSE_API_ROOT', DATAMUSE_API_ROOT))
@@ -1,8 +1,11 @@
 from abc import abstractmethod
-from typing import Tuple
+from typing import List, Tuple
 
 
 class Namor:
     @abstractmethod
     def generate_name(self, sex: str) -> Tuple[str, str]:
         raise NotImplementedError()
+
+    def generate_names(self, sex: str, n: int) -> List[Tuple[str, str]]:
+        return [self.generate_name(sex) for _ in range(n)]
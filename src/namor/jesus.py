@@ -1,11 +1,8 @@
-import csv
 import random
 from typing import Tuple
 
-from tracery import Grammar
-
-from ..debbi import (FIRST_NAMES_FEMALE, FIRST_NAMES_MALE, LAST_NAMES,
-                     NAMES_MEANING)
+from ..debbi import LAST_NAMES, get_name_meanings, get_names
+from ..grammar import CompiledGrammar
 from .abstracts import Namor
 
 
@@ -19,22 +16,12 @@ class JesusNamor(Namor):
             'first_name_M': [],
         }
 
-        self.last_names = [x for x in LAST_NAMES if x[0] == 'C']
-
-        for name in NAMES_MEANING:
-            if name[0] == 'K':
-                break
-
-            if name[0] != 'J':
-                continue
-
-            if name in FIRST_NAMES_FEMALE:
-                dictionary['first_name_F'].append(name)
+        self.last_names = [x for x in LAST_NAMES() if x[0] == 'C']
 
-            elif name in FIRST_NAMES_MALE:
-                dictionary['first_name_M'].append(name)
+        dictionary['first_name_F'].extend(get_names('J', 'F'))
+        dictionary['first_name_M'].extend(get_names('J', 'M'))
 
-        self.grammar = Grammar(dictionary)
+        self.grammar = CompiledGrammar(dictionary)
 
     def generate_name(self, sex: str) -> Tuple[str, str]:
         return (self.grammar.flatten('#{}#'.format(sex)),
@@ -53,6 +40,6 @@ def main():
 
             sex = random.choice(['F', 'M'])
             name = namor.generate_name(sex)
-            print(sex, ':', ' '.join(name), NAMES_MEANING[name[0]])
+            print(sex, ':', ' '.join(name), get_name_meanings(name[0]))
     except KeyboardInterrupt:
         pass
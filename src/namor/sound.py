@@ -1,50 +1,177 @@
+import hashlib
+import json
 import os
 import random
 from os import path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Sequence, Tuple, Union
 
+import numpy as np
 import pycorpora
-from pincelate import Pincelate
+from keras import backend as K
+from keras.models import Model
+from pincelate.featurephone import phone_feature_map
 from textgenrnn import textgenrnn
 
+from ..phonetics import BatchPincelate
 from .abstracts import Namor
 
+MODEL_DIR = 'models'
+MODEL_VERSION = 1
+
+Temperature = Union[float, List[float]]
+
+
+# textgenrnn that samples many texts with one predict call per step instead
+# of one call per character of every text. Sampling follows
+# textgenrnn_generate (not interactive, no prefix).
+class BatchTextgenrnn(textgenrnn):
+    def generate_many(self, n: int,
+                      temperature: Temperature = [1.0, 0.5, 0.2, 0.2],
+                      max_gen_length: int = 300,
+                      batch_size: int = 1024) -> List[str]:
+        if not isinstance(temperature, list):
+            temperature = [temperature]
+
+        model = self.model
+        if len(model.inputs) > 1:
+            model = Model(inputs=model.inputs[0], outputs=model.outputs[1])
+
+        maxlen = self.config['max_length']
+        meta = self.vocab[self.META_TOKEN]
+
+        # Last maxlen tokens of every text, left padded like pad_sequences
+        encoded = np.zeros((n, maxlen), dtype=np.int32)
+        encoded[:, -1] = meta
+
+        texts: List[List[str]] = [[] for _ in range(n)]
+        active = np.ones(n, dtype=bool)
+
+        length = 1
+        while active.any() and length < max_gen_length:
+            rows = np.flatnonzero(active)
+            next_temperature = temperature[(length - 1) % len(temperature)]
+
+            preds = model.predict(encoded[rows], batch_size=batch_size)
+            sampled = self._sample(preds.astype(np.float64), next_temperature)
+
+            length += 1
+
+            encoded[rows, :-1] = encoded[rows, 1:]
+            encoded[rows, -1] = sampled
+
+            for i, idx in zip(rows, sampled):
+                if idx == meta:
+                    active[i] = False
+                else:
+                    texts[i].append(self.indices_char[idx])
+
+        return [''.join(x) for x in texts]
+
+    @staticmethod
+    def _sample(preds: np.ndarray, temperature: float) -> np.ndarray:
+        if temperature is None or temperature == 0.0:
+            return preds.argmax(axis=1)
+
+        preds = np.log(preds + K.epsilon()) / temperature
+        preds = np.exp(preds - preds.max(axis=1, keepdims=True))
+        preds /= preds.sum(axis=1, keepdims=True)
+
+        sampled = np.minimum(
+            (preds.cumsum(axis=1) <
+             np.random.random((len(preds), 1))).sum(axis=1),
+            preds.shape[1] - 1)
+
+        # Index 0 is padding; textgenrnn takes the second most likely instead
+        zero = sampled == 0
+        if zero.any():
+            sampled[zero] = np.argsort(preds[zero], axis=1)[:, -2]
+
+        return sampled
+
 
 class SoundNamor(Namor):
-    def __init__(self, corpus: Dict[str, List[str]]):
-        self.pin = Pincelate()
+    num_epochs = 10
+    temperature: Temperature = [1.0, 0.5, 0.2, 0.2]
 
-        corpus = {k: [self.pin.soundout(v.lower())
-                      for x in v] for k, v in corpus}
-        max_length = max(map(len, corpus))
+    def __init__(self, corpus: Dict[str, List[str]]):
+        self.pin = BatchPincelate()
 
-        self.rnn: Dict[str, textgenrnn] = {}
-        file_name = 'models/sound_namor_{}.hdf5'.format
+        self.rnn: Dict[str, BatchTextgenrnn] = {}
+        self.max_length: Dict[str, int] = {}
         for sex in {'F', 'M'}:
-            if path.isfile(file_name(sex)):
-                self.rnn[sex] = textgenrnn(file_name, name=file_name(sex))
+            self.rnn[sex] = self.load_or_train(sex, corpus[sex])
+
+    def model_name(self, sex: str, names: Sequence[str]) -> str:
+        settings = {
+            'version': MODEL_VERSION,
+            'num_epochs': self.num_epochs,
+            'names': list(names)
+        }
+        digest = hashlib.sha1(json.dumps(
+            settings, sort_keys=True).encode('utf-8')).hexdigest()
+
+        return path.join(MODEL_DIR, 'sound_namor_{}_{}'.format(
+            sex, digest[:16]))
+
+    # textgenrnn writes '{name}_weights.hdf5' after every epoch and the vocab
+    # and config before the first, so training runs under a partial name and
+    # the files are renamed once it finishes, the config last
+    def load_or_train(self, sex: str,
+                      names: Sequence[str]) -> BatchTextgenrnn:
+        name = self.model_name(sex, names)
+        files = ('_weights.hdf5', '_vocab.json', '_config.json')
+
+        if all(path.isfile(name + x) for x in files):
+            rnn = BatchTextgenrnn(*(name + x for x in files), name=name)
+            self.max_length[sex] = rnn.config['max_gen_length']
+
+            return rnn
+
+        texts = [' '.join(self.pin.soundout(x.lower())) for x in names]
+        self.max_length[sex] = max(map(len, texts)) + 1
+
+        os.makedirs(MODEL_DIR, exist_ok=True)
+
+        partial = name + '.partial'
+
+        rnn = BatchTextgenrnn(name=partial)
+        rnn.train_on_texts(
+            texts,
+            num_epochs=self.num_epochs,
+            max_gen_length=self.max_length[sex],
+            new_model=True)
+
+        rnn.config.update({
+            'name': name,
+            'max_gen_length': self.max_length[sex]
+        })
+        with open(partial + '_config.json', 'w', encoding='utf8') as f:
+            json.dump(rnn.config, f, ensure_ascii=False)
+
+        for x in files:
+            os.replace(partial + x, name + x)
+
+        return rnn
 
-            else:
-                self.rnn[sex] = textgenrnn(name='sound_namor_{}'.format(sex))
+    def generate_names(self, sex: str, n: int) -> List[Tuple[str, str]]:
+        sounds = self.rnn[sex].generate_many(
+            n, self.temperature, self.max_length[sex])
 
-                self.rnn[sex].train_on_texts(
-                    [' '.join(x) for x in corpus[sex]],
-                    num_epochs=10,
-                    max_gen_length=max_length,
-                    new_model=True)
-                # TODO: Finetune epoch count
+        # The model writes characters, so drop anything that is not a phone
+        spellings = self.pin.spell_many(
+            [[y for y in x.split(' ') if y.rstrip('012') in phone_feature_map]
+             for x in sounds])
 
-                self.rnn[sex].save(file_name)
+        return [(x.capitalize(), '') for x in spellings]
 
     def generate_name(self, sex: str) -> Tuple[str, str]:
-        return self.pin.spell(self.rnn[sex].generate(
-            return_as_list=True)[0].split(' ')).capitalize()
+        return self.generate_names(sex, 1)[0]
 
 
 def main():
     # TODO: Replace with better, sex-separated data
-    namor = SoundNamor(
-        pycorpora.get_file('humans', 'firstNames')['firstNames'])
+    names = pycorpora.get_file('humans', 'firstNames')['firstNames']
+    namor = SoundNamor({'F': names, 'M': names})
 
     try:
         while True:
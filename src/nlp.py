@@ -0,0 +1,80 @@
+import os
+import resource
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+# Pipes each profile needs; None keeps every pipe of the model
+PROFILES: Dict[str, Optional[Tuple[str, ...]]] = {
+    'tokenizer': (),
+    'tagger': ('tagger',),
+    'tagger+ner': ('tagger', 'ner'),
+    'full': None
+}
+
+_MODELS: Dict[str, Any] = {}
+_STATS: Dict[str, Dict[str, float]] = {}
+_LOCK = threading.Lock()
+
+
+def rss_mb() -> float:
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+
+        return pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+
+
+class Pipeline:
+    def __init__(self, nlp, disable: Tuple[str, ...]):
+        self.nlp = nlp
+        self.disable = list(disable)
+
+    def __call__(self, text: str):
+        if len(self.disable) == len(self.nlp.pipe_names):
+            return self.nlp.make_doc(text)
+
+        return self.nlp(text, disable=self.disable)
+
+    def pipe(self, texts: Iterable[str], **kwargs) -> Iterator:
+        return self.nlp.pipe(texts, disable=self.disable, **kwargs)
+
+    def __getattr__(self, name: str):
+        return getattr(self.nlp, name)
+
+
+def _load(name: str):
+    with _LOCK:
+        if name not in _MODELS:
+            import spacy
+
+            rss = rss_mb()
+            start = time.perf_counter()
+
+            _MODELS[name] = spacy.load(name)
+
+            _STATS[name] = {
+                'seconds': time.perf_counter() - start,
+                'rss_mb': rss_mb() - rss
+            }
+
+    return _MODELS[name]
+
+
+def load_model(name: str, profile: str = 'full') -> Pipeline:
+    if profile not in PROFILES:
+        raise ValueError('Unknown pipeline profile: {}'.format(profile))
+
+    nlp = _load(name)
+
+    enabled = PROFILES[profile]
+    if enabled is None:
+        return Pipeline(nlp, ())
+
+    return Pipeline(nlp, tuple(x for x in nlp.pipe_names if x not in enabled))
+
+
+def report() -> Dict[str, Dict[str, float]]:
+    return {k: dict(v) for k, v in _STATS.items()}
@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+from collections import deque
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from .abstracts import Processor
+
+# The processor owned by a pool worker, built once by _init
+_PROCESSOR: Optional[Processor] = None
+
+
+def _init(factory: Callable[[], Processor]):
+    global _PROCESSOR
+    _PROCESSOR = factory()
+
+
+def _work(task: Tuple[List[str], dict]) -> List[str]:
+    shard, kwargs = task
+
+    assert _PROCESSOR is not None
+
+    return [_PROCESSOR.process_text(x, **kwargs) for x in shard]
+
+
+def _shards(chunks: Iterable[str], size: int) -> Iterator[List[str]]:
+    chunks = iter(chunks)
+
+    shard = list(islice(chunks, size))
+    while shard:
+        yield shard
+        shard = list(islice(chunks, size))
+
+
+# Runs the processor built by `factory` in a pool of worker processes, so
+# each worker loads its models once. Input is sharded at paragraph
+# boundaries and output comes back in input order; at most `max_pending`
+# shards are in flight, so memory stays flat however long the input is.
+# Unless the platform forks, `factory` must be picklable (a class or
+# functools.partial).
+class ParallelProcessor(Processor):
+    def __init__(self, factory: Callable[[], Processor],
+                 processes: Optional[int] = None, shard_size: int = 8,
+                 separator: str = '\n\n', context: Optional[str] = None,
+                 max_pending: Optional[int] = None):
+        self.factory = factory
+        self.processes = processes
+        self.shard_size = shard_size
+        self.max_pending = max_pending or 2 * (
+            processes or os.cpu_count() or 1)
+        self.separator = separator
+        self.context = context
+
+        self._pool = None
+
+    def pool(self):
+        if self._pool is None:
+            self._pool = multiprocessing.get_context(self.context).Pool(
+                self.processes, initializer=_init, initargs=(self.factory,))
+
+        return self._pool
+
+    def process_stream(self, chunks: Iterable[str],
+                       **kwargs) -> Iterator[str]:
+        pool = self.pool()
+        pending: deque = deque()
+
+        for shard in _shards(chunks, self.shard_size):
+            pending.append(pool.apply_async(_work, ((shard, kwargs),)))
+
+            if len(pending) >= self.max_pending:
+                yield from pending.popleft().get()
+
+        while pending:
+            yield from pending.popleft().get()
+
+    def process_text(self, input_text: str, **kwargs) -> str:
+        return self.separator.join(self.process_stream(
+            input_text.split(self.separator), **kwargs))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def terminate(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is None:
+            self.close()
+        else:
+            self.terminate()
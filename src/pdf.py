@@ -0,0 +1,51 @@
+from itertools import islice
+from typing import Iterable
+
+from reportlab.platypus import Flowable, Frame, PageTemplate, SimpleDocTemplate
+
+
+# SimpleDocTemplate that lays out flowables as they are pulled from an
+# iterable, holding at most `chunk_size` of them at a time. reportlab keeps
+# finished pages on the canvas until the file is saved, so they are stored
+# compressed.
+class StreamingDocTemplate(SimpleDocTemplate):
+    def __init__(self, filename: str, **kwargs):
+        kwargs.setdefault('pageCompression', 1)
+
+        SimpleDocTemplate.__init__(self, filename, **kwargs)
+
+    def build_stream(self, flowables: Iterable[Flowable],
+                     chunk_size: int = 256) -> int:
+        self._calc()
+
+        frame = Frame(self.leftMargin, self.bottomMargin, self.width,
+                      self.height, id='normal')
+        self.addPageTemplates([
+            PageTemplate(id='First', frames=frame, pagesize=self.pagesize),
+            PageTemplate(id='Later', frames=frame, pagesize=self.pagesize)])
+
+        flowables = iter(flowables)
+        pending = list(islice(flowables, chunk_size))
+
+        self._startBuild()
+
+        canv = self.canv
+        info = canv._doc.info
+        try:
+            canv._doctemplate = self
+
+            while len(pending) > 0:
+                self.clean_hanging()
+                self.handle_flowable(pending)
+
+                # keepWithNext looks one flowable ahead
+                if len(pending) < 2:
+                    pending.extend(islice(flowables, chunk_size))
+        finally:
+            del canv._doctemplate
+
+        canv._doc.info = info
+
+        self._endBuild()
+
+        return self.page
@@ -0,0 +1,136 @@
+from typing import List, Sequence
+
+import numpy as np
+from pincelate import Pincelate
+from pincelate.featurephone import phone_feature_map
+
+
+# Runs pincelate's orthography -> phoneme -> orthography round trip for many
+# words at once, mirroring Pincelate.manipulate without letter or feature
+# weights. spell_many does the same for Pincelate.spell.
+class BatchPincelate(Pincelate):
+    # pincelate's padding length, for models that leave the length open
+    src_length = 31
+
+    # Longest sequence the model accepts, which also bounds how long a
+    # decoding can usefully run: a word of src_length - 2 letters has at most
+    # that many phones and back
+    def _max_length(self, model) -> int:
+        return model.infer_encoder_model.input_shape[1] or self.src_length
+
+    def _phoneme_features(self, words: Sequence[str]) -> List[np.ndarray]:
+        model = self.orth2phon
+
+        src = np.zeros((len(words), self._max_length(model),
+                        len(model.src_vocab)))
+        for i, word in enumerate(words):
+            for j, char in enumerate('^' + word + '$'):
+                src[i, j, model.src_vocab_idx_map[char]] = 1.
+
+        state = model.infer_encoder_model.predict(src, batch_size=len(words))
+
+        target = np.zeros((len(words), 1, len(model.target_vocab)))
+        target[:, 0, model.target_vocab_idx_map['beg']] = 1.
+
+        end = model.target_vocab_idx_map['end']
+        seqs = [[target[i, 0]] for i in range(len(words))]
+        done = np.zeros(len(words), dtype=bool)
+        for _ in range(self._max_length(model)):
+            target, state = model.infer_decoder_model.predict(
+                [target, state], batch_size=len(words))
+
+            # Same stopping rule as pincelate: 'end' among the top three
+            top = np.argsort(target[:, -1, :], axis=1)[:, -3:]
+            for i in np.flatnonzero(~done):
+                seqs[i].append(target[i, 0])
+
+                if end in top[i]:
+                    done[i] = True
+
+            if done.all():
+                break
+
+        return [np.array(x) for x in seqs]
+
+    def _spell_features(self, seqs: Sequence[np.ndarray],
+                        temperature: float) -> List[str]:
+        model = self.phon2orth
+        vocab = model.target_vocab
+
+        src = np.zeros((len(seqs), max(map(len, seqs)), len(model.src_vocab)))
+        for i, seq in enumerate(seqs):
+            src[i, :len(seq)] = seq
+
+        state = model.infer_encoder_model.predict(src, batch_size=len(seqs))
+
+        target = np.zeros((len(seqs), 1, len(vocab)))
+        target[:, 0, model.target_vocab_idx_map['^']] = 1.
+
+        end = model.target_vocab_idx_map['$']
+        chars: List[List[str]] = [['^'] for _ in seqs]
+        done = np.zeros(len(seqs), dtype=bool)
+        for _ in range(self._max_length(model)):
+            output, state = model.infer_decoder_model.predict(
+                [target, state], batch_size=len(seqs))
+
+            dist = np.exp(np.log(output[:, -1, :].astype(np.float64) +
+                                 0.0001) / temperature)
+            dist /= dist.sum(axis=1, keepdims=True)
+
+            sampled = np.minimum(
+                (dist.cumsum(axis=1) <
+                 np.random.random((len(seqs), 1))).sum(axis=1),
+                len(vocab) - 1)
+
+            target = np.zeros(target.shape)
+            target[np.arange(len(seqs)), 0, sampled] = 1.
+
+            for i, idx in enumerate(sampled):
+                chars[i].append(vocab[idx])
+
+            done |= sampled == end
+            if done.all():
+                break
+
+        return [''.join(x[1:x.index('$')] if '$' in x else x[1:])
+                for x in chars]
+
+    # Source features of Pincelate.spell, padded to its fixed length
+    def _spelling_features(self, phones: Sequence[str]) -> np.ndarray:
+        feats = []
+        for phone in phones:
+            if phone[-1] in ('1', '2'):
+                feats.append(phone_feature_map[phone[:-1]] + ('str',))
+            elif phone[-1] == '0':
+                feats.append(phone_feature_map[phone[:-1]])
+            else:
+                feats.append(phone_feature_map[phone])
+
+        return self.phon2orth.vectorize_src(
+            [['beg']] + feats + [['end']],
+            maxlen=self._max_length(self.phon2orth))[0]
+
+    def spell_many(self, phone_seqs: Sequence[Sequence[str]],
+                   temperature: float = .25,
+                   batch_size: int = 256) -> List[str]:
+        ret: List[str] = []
+
+        for start in range(0, len(phone_seqs), batch_size):
+            ret.extend(self._spell_features(
+                [self._spelling_features(x)
+                 for x in phone_seqs[start:start + batch_size]],
+                temperature))
+
+        return ret
+
+    def manipulate_many(self, words: Sequence[str], temperature: float = .25,
+                        batch_size: int = 256) -> List[str]:
+        ret: List[str] = []
+
+        for start in range(0, len(words), batch_size):
+            batch = words[start:start + batch_size]
+
+            ret.extend(self._spell_features(
+                self._phoneme_features(batch), temperature))
+
+        return ret
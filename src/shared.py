@@ -1,11 +1,8 @@
 import re
 import textwrap
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
 from cytoolz.functoolz import pipe
-from textacy.preprocessing import (normalize_hyphenated_words,
-                                   normalize_quotation_marks,
-                                   normalize_unicode, normalize_whitespace)
 
 from .abstracts import Processor
 
@@ -14,6 +11,11 @@ class CleaningProcessor(Processor):
     clean_pattern = re.compile(r'[\n_]')
 
     def process_text(self, input_text: str, **kwargs) -> str:
+        from textacy.preprocessing import (normalize_hyphenated_words,
+                                           normalize_quotation_marks,
+                                           normalize_unicode,
+                                           normalize_whitespace)
+
         return pipe(
             input_text,
             lambda x: self.clean_pattern.sub(' ', x),
@@ -38,3 +40,29 @@ class TextWrapProcessor(Processor):
 
         return '\n'.join(textwrap.wrap(
             input_text, width, replace_whitespace=repl_white))
+
+    # Wraps chunks as if they were one text: the last, possibly short, line
+    # of each chunk is carried into the next
+    def wrap_stream(self, chunks: Iterable[str], **kwargs) -> Iterator[str]:
+        width = kwargs.get('width', self.width or 70)
+
+        repl_white = kwargs.get(
+            'replace_whitespace', self.replace_whitespace or True)
+
+        carry = ''
+        for chunk in chunks:
+            lines = textwrap.wrap(carry + ' ' + chunk if carry else chunk,
+                                  width, replace_whitespace=repl_white)
+
+            if len(lines) == 0:
+                continue
+
+            yield from lines[:-1]
+            carry = lines[-1]
+
+        if carry:
+            yield carry
+
+    def process_stream(self, chunks: Iterable[str],
+                       **kwargs) -> Iterator[str]:
+        return self.wrap_stream(chunks, **kwargs)
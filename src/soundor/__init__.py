@@ -1,37 +1,50 @@
 import string
 from typing import List, Optional
 
-import spacy
-from cytoolz.functoolz import pipe
-from pincelate import Pincelate
-
-from ..abstracts import Processor
+from ..abstracts import ComposedProcessor, Processor
+from ..nlp import load_model
+from ..parallel import ParallelProcessor
+from ..phonetics import BatchPincelate
 from ..shared import CleaningProcessor, TextWrapProcessor
 
 
 class SoundorProcessor(Processor):
-    def __init__(self, temperature: Optional[float] = None):
-        self.nlp = spacy.load('en_core_web_lg')
-        self.pin = Pincelate()
+    max_word_length = BatchPincelate.src_length - 2
+
+    def __init__(self, temperature: Optional[float] = None,
+                 batch_size: int = 256):
+        self.nlp = load_model('en_core_web_lg', 'tokenizer')
+        self.pin = BatchPincelate()
         self.temperature = temperature
+        self.batch_size = batch_size
         self.cleaner = CleaningProcessor()
 
+    def eligible(self, orth: str) -> bool:
+        return (len(orth) <= self.max_word_length and
+                all(x in string.ascii_lowercase for x in orth))
+
     def process_text(self, input_text: str, **kwargs) -> str:
         temperature = kwargs.get('temperature', self.temperature or .25)
+        batch_size = kwargs.get('batch_size', self.batch_size)
+
+        tokens = [token.orth_
+                  for token in self.nlp(input_text >> self.cleaner)]
+
+        words = list(dict.fromkeys(x.lower() for x in tokens
+                                   if self.eligible(x)))
+        respelled = dict(zip(words, self.pin.manipulate_many(
+            words, temperature=temperature, batch_size=batch_size)))
 
         result: List[str] = []
 
-        for token in self.nlp(input_text >> self.cleaner):
-            if any(x not in string.ascii_lowercase for x in token.orth_):
-                result.append(token.orth_)
+        for orth in tokens:
+            if not self.eligible(orth):
+                result.append(orth)
 
             else:
-                new_token = pipe(
-                    token.orth_.lower(),
-                    lambda x: self.pin.manipulate(x, temperature=temperature)
-                )
+                new_token = respelled[orth.lower()]
 
-                if token.orth_ == token.orth_.capitalize():
+                if orth == orth.capitalize():
                     new_token = new_token.capitalize()
 
                 result.append(new_token)
@@ -40,14 +53,12 @@ class SoundorProcessor(Processor):
 
 
 def main():
-    text = open('src/synonymize/hounds_sherlock.txt').read().replace('_', '')
-
-    text = (text >> CleaningProcessor()
-            >> SoundorProcessor()
-            >> TextWrapProcessor())
+    with ParallelProcessor(SoundorProcessor) as soundor:
+        processor = ComposedProcessor(soundor, TextWrapProcessor(),
+                                      threaded=True)
 
-    with open('soundor.txt', 'w') as f:
-        f.write(text)
+        processor.process_file(
+            'src/synonymize/hounds_sherlock.txt', 'soundor.txt')
 
 
 if __name__ == "__main__":
@@ -1,128 +1,159 @@
 from collections import OrderedDict
+from itertools import islice
 from os import path
-from typing import Dict, List, Optional, Set, Tuple, cast
+from typing import Dict, List, Optional, Set, Tuple
 
 import nltk
 import pycorpora
-import spacy
 import yaml
 from cytoolz.functoolz import pipe
-from datamuse import Datamuse
 from nltk import sent_tokenize
 from nltk.corpus import wordnet as wn
-from spacy.tokens import Token
+from numpy.linalg import svd
+from spacy.tokens import Doc, Token
 from sumy.nlp.stemmers import Stemmer
 from sumy.nlp.tokenizers import Tokenizer
 from sumy.parsers.plaintext import PlaintextParser
 from sumy.summarizers.lsa import LsaSummarizer
 
 from ..abstracts import Processor
+from ..muse import DATAMUSE, CachedDatamuse
+from ..nlp import load_model
 from ..shared import CleaningProcessor, TextWrapProcessor
 from ..util import (UNIVERSAL_TO_DATAMUSE, WHITESPACE_PATTERN, get_stop_words,
-                    list_sums, word_count)
+                    min_subset_sum, word_count)
+from .patterns import PatternMatcher
+from .store import SynonymStore
+
+
+def load_patterns(data: dict) -> Dict[str, str]:
+    patterns: Dict[str, str] = OrderedDict()
+
+    patterns.update(data['shorten'])
+    patterns.update(data['expand'])
+
+    filler = data['filler'] + pycorpora.get_file(
+        'humans', 'prefixes')['prefixes']
+
+    patterns.update({k: '' for k in filler})
+
+    for obj in pycorpora.get_file('words', 'compounds')['compounds']:
+        key = '{} {}'.format(obj['firstWord'], obj['secondWord'])
+        if key not in patterns:
+            patterns[key] = obj['compoundWord']
+
+    patterns.update({
+        k.capitalize(): v.capitalize()
+        for k, v in patterns.items()
+    })
+
+    return patterns
 
 
 class SpreadShredProcessor(Processor):
     separator = "<:>"
 
-    def __init__(self, input_texts: str):
+    def __init__(self, input_texts: List[str], batch_size: int = 256,
+                 n_process: int = 1, prefetch_size: int = 1000):
         nltk.download('punkt')
 
-        self.nlp = spacy.load('en_core_web_lg')
+        self.nlp = load_model('en_core_web_lg', 'tagger')
 
         self.summarizer = LsaSummarizer(Stemmer('english'))
         self.summarizer.stop_words = get_stop_words('english')
 
         self.cleaner = CleaningProcessor()
 
-        self.synonyms: Dict[str, Optional[List[str]]] = {}
-        if path.isfile('src/syns.yaml'):
-            with open('src/syns.yaml', 'r') as f:
-                self.synonyms = yaml.safe_load(f)
-
-        if self.synonyms is None:
-            self.synonyms = {}
-
-        self.patterns: Dict[str, str] = OrderedDict()
-        self.rev_patterns: Dict[str, str] = OrderedDict()
+        self.synonyms = SynonymStore()
+        if len(self.synonyms) == 0 and path.isfile('src/syns.yaml'):
+            self.synonyms.import_yaml('src/syns.yaml')
 
         with open('src/spreadr_shreddr/data.yaml', 'r') as f:
             data = yaml.safe_load(f)
 
-        self.patterns.update(data['shorten'])
-        self.patterns.update(data['expand'])
+        self.patterns = load_patterns(data)
+        self.matcher = PatternMatcher(self.patterns)
 
-        data['filler'].extend(pycorpora.get_file(
-            'humans', 'prefixes')['prefixes'])
+        self.brits = data['brit_am']
+        self.murcans = {v: k for k, v in self.brits.items()}
 
-        self.patterns.update({k: '' for k in data['filler']})
+        api = DATAMUSE()
 
-        for obj in pycorpora.get_file('words', 'compounds')['compounds']:
-            key = '{} {}'.format(obj['firstWord'], obj['secondWord'])
-            if key not in self.patterns:
-                self.patterns[key] = obj['compoundWord']
+        sentences = (sent for text in input_texts
+                     for sent in sent_tokenize(text >> self.cleaner))
 
-        self.patterns.update({
-            k.capitalize(): v.capitalize()
-            for k, v in self.patterns.items()
-        })
+        docs = self.nlp.pipe(sentences, batch_size=batch_size,
+                             n_process=n_process)
 
-        self.brits = data['brit_am']
-        self.murcans = {v: k for k, v in self.brits.items()}
+        # Lookups are prefetched a batch of sentences at a time, so only
+        # that many parsed sentences are held at once. Whatever was mined is
+        # kept even if mining stops partway.
+        try:
+            batch = list(islice(docs, prefetch_size))
+            while batch:
+                api.prefetch(
+                    word.orth_.lower() for doc in batch for word in doc
+                    if word.pos_ in UNIVERSAL_TO_DATAMUSE and
+                    self.separator.join((word.orth_.lower(), word.tag_))
+                    not in self.synonyms and
+                    len(wn.synsets(word.orth_.lower())) <= 1)
 
-        changed = False
-        api = Datamuse()
-        for text in input_texts:
-            text >>= self.cleaner
+                for doc in batch:
+                    self._mine(api, doc, batch_size)
 
-            for sent in sent_tokenize(text):
-                for index, word in enumerate(self.nlp(sent)):
-                    orth = word.orth_.lower()
-                    key = self.separator.join((orth, word.tag_))
+                batch = list(islice(docs, prefetch_size))
+        finally:
+            self.synonyms.flush()
 
-                    if key not in self.synonyms:
-                        changed = True
-                        syns: List[str] = []
+    def _mine(self, api: CachedDatamuse, doc: Doc, batch_size: int):
+        for word in doc:
+            orth = word.orth_.lower()
+            key = self.separator.join((orth, word.tag_))
 
-                        if (word.pos_ in UNIVERSAL_TO_DATAMUSE and
-                                len(wn.synsets(orth)) <= 1):
-                            res = api.words(ml=orth)
+            if key not in self.synonyms:
+                syns: List[str] = []
 
-                            if len(res) > 0:
-                                syns = self._get_synonyms(
-                                    ' '.join(sent), (index, word), res)
+                if (word.pos_ in UNIVERSAL_TO_DATAMUSE and
+                        len(wn.synsets(orth)) <= 1):
+                    res = api.words(ml=orth)
 
-                        if len(syns) > 1:
-                            self.synonyms[key] = syns
-                        else:
-                            self.synonyms[key] = None
+                    if len(res) > 0:
+                        syns = self._get_synonyms(doc, word, res, batch_size)
 
-                    if changed:
-                        changed = False
-                        with open('src/syns.yaml', 'a') as f:
-                            f.write(yaml.dump({key: self.synonyms[key]}))
+                if len(syns) > 1:
+                    self.synonyms[key] = syns
+                else:
+                    self.synonyms[key] = None
 
-    def _get_synonyms(self, sentence: str, word: Tuple[int, Token],
-                      candidates: list) -> List[str]:
+    def _get_synonyms(self, sentence: Doc, word: Token, candidates: list,
+                      batch_size: int = 256) -> List[str]:
         def tagged(x):
             return ('tags' in x and 'syn' in x['tags'] and
-                    'prop' not in x['tags'] and word_count(x['word']) == 1)
+                    'prop' not in x['tags'] and word_count(x['word']) == 1 and
+                    UNIVERSAL_TO_DATAMUSE[word.pos_] in x['tags'])
+
+        def substituted(x):
+            return ''.join(x + t.whitespace_ if t.i == word.i
+                           else t.text_with_ws for t in sentence)
 
-        def match_pos(x):
-            return (word[1].tag_ == self.nlp(
-                sentence.replace(word[1].orth_, x['word']))[word[0]].tag_ and
-                UNIVERSAL_TO_DATAMUSE[word[1].pos_] in x['tags'])
+        words = [obj['word'] for obj in candidates if tagged(obj)]
 
-        return [word[1].orth_] + [obj['word'] for obj in candidates
-                                  if tagged(obj) and match_pos(obj)]
+        # Every candidate sentence for this word is tagged in one batch
+        retagged = self.nlp.pipe((substituted(x) for x in words),
+                                 batch_size=batch_size)
+
+        return [word.orth_] + [x for x, doc in zip(words, retagged)
+                               if len(doc) > word.i and
+                               doc[word.i].tag_ == word.tag_]
 
     def replace_synonym(
             self, word: Token, desired_char_change: int) -> Tuple[str, int]:
         key = self.separator.join((word.orth_.lower(), word.tag_))
 
-        if key in self.synonyms and self.synonyms[key] is not None:
+        synonyms = self.synonyms.get(key)
+        if synonyms is not None:
             length = len(word.orth_)
-            ideal = min(cast(List[str], self.synonyms[key]),
+            ideal = min(synonyms,
                         key=lambda x: abs(
                             desired_char_change + length - len(x)))
 
@@ -143,23 +174,37 @@ class SpreadShredProcessor(Processor):
 
         return (ideal, desired_char_change + length - len(ideal))
 
-    def summarize(self, excerpt: str, len_s: int) -> str:
-        parser = PlaintextParser.from_string(excerpt, Tokenizer('english'))
+    def rank_sentences(
+            self, excerpt: str) -> Tuple[List[str], Optional[List[int]]]:
+        document = PlaintextParser.from_string(
+            excerpt, Tokenizer('english')).document
+        sentences = [str(s) for s in document.sentences]
 
-        document = parser.document
         dictionary = self.summarizer._create_dictionary(document)
+        if not dictionary or len(dictionary) < len(sentences):
+            return (sentences, None)
+
+        matrix = self.summarizer._compute_term_frequency(
+            self.summarizer._create_matrix(document, dictionary))
+        _, sigma, v = svd(matrix, full_matrices=False)
+        ranks = self.summarizer._compute_ranks(sigma, v)
 
-        if dictionary is None:
-            return excerpt
+        # Best first; the summary of length n is the first n in text order
+        return (sentences, sorted(range(len(ranks)),
+                                  key=lambda i: ranks[i], reverse=True))
 
-        words_count = len(dictionary)
-        sentences_count = len(document.sentences)
-        if words_count < sentences_count:
-            return excerpt
+    @staticmethod
+    def _summary(ranking: Tuple[List[str], Optional[List[int]]],
+                 len_s: int) -> Optional[str]:
+        sentences, order = ranking
 
-        sents = self.summarizer(parser.document, len_s)
+        if order is None:
+            return None
 
-        return ' '.join(str(s) for s in sents)
+        return ' '.join(sentences[i] for i in sorted(order[:len_s]))
+
+    def summarize(self, excerpt: str, len_s: int) -> str:
+        return self._summary(self.rank_sentences(excerpt), len_s) or excerpt
 
     def process_text(self, input_text: str, **kwargs) -> str:
         cleaned_text = input_text >> self.cleaner
@@ -176,29 +221,25 @@ class SpreadShredProcessor(Processor):
         dword_change = 0
         if word_length is not None:
             dword_change = word_length - word_count(cleaned_text)
-            print('a', dword_change)
 
         # Summarize paragraphs
         if dword_change < 0:
             paragraphs = {x: word_count(x) for x in (
                 p >> self.cleaner for p in input_text.split('\n\n'))}
+            rankings = {p: self.rank_sentences(p) for p in paragraphs}
             pgraph_keys = sorted(
-                paragraphs, key=lambda x: len(PlaintextParser.from_string(
-                    x, Tokenizer('english')).document.sentences), reverse=True)
+                paragraphs, key=lambda x: len(rankings[x][0]), reverse=True)
 
             ideals: List[Tuple[int, str, str]] = []
             d = {}
-            for len_s in range(1, len(PlaintextParser.from_string(
-                    pgraph_keys[0], Tokenizer('english')).document.sentences)):
+            for len_s in range(1, len(rankings[pgraph_keys[0]][0])):
                 for p in pgraph_keys:
-                    if len(PlaintextParser.from_string(
-                            p, Tokenizer('english')
-                    ).document.sentences) <= len_s:
+                    if len(rankings[p][0]) <= len_s:
                         break
 
-                    repl = self.summarize(p, len_s)
+                    repl = self._summary(rankings[p], len_s)
 
-                    if repl.count('"') % 2 != 0:
+                    if repl is None or repl.count('"') % 2 != 0:
                         continue
 
                     diff = word_count(repl) - paragraphs[p]
@@ -210,10 +251,13 @@ class SpreadShredProcessor(Processor):
 
                     ideals.append((diff, p, repl))
 
-            # Check paragraph combinations
-            possible = list_sums((x[0] for x in ideals), dword_change)
-            if len(possible) > 0:
-                for diff, p, repl in min(possible, key=len):
+            # Check paragraph combinations, one summary per paragraph
+            combination = min_subset_sum(
+                [x[0] for x in ideals], dword_change,
+                groups=[x[1] for x in ideals],
+                timeout=kwargs.get('subset_timeout', 60))
+            if combination is not None:
+                for diff, p, repl in (ideals[i] for i in combination):
                     cleaned_text = cleaned_text.replace(p, '{}'.format(repl))
 
                     dword_change -= diff
@@ -241,34 +285,22 @@ class SpreadShredProcessor(Processor):
             return WHITESPACE_PATTERN.sub(' ', ' {} '.format(x))
 
         # Patterns for word count
-        done: Set[str] = set()
-        while dword_change < 0 and len(done) != len(self.patterns):
-            done.clear()
-            for k, v in self.patterns.items():
-                if dword_change == 0 and dchar_change == 0:
-                    print('b', dword_change)
-                    return cleaned_text
-
-                if v == '':
-                    diff = -word_count(k)
-                else:
-                    diff = word_count(v) - word_count(k)
+        while dword_change < 0:
+            (rewritten, dword_change, dchar_change) = self.matcher.rewrite(
+                cleaned_text, dword_change, dchar_change,
+                count_chars=char_length is not None)
 
-                if(abs(dword_change - diff) < abs(dword_change) and
-                        cleaned_text.find(space(k)) != -1):
-                    cleaned_text = cleaned_text.replace(space(k), space(v), 1)
+            if rewritten == cleaned_text:
+                break
 
-                    dword_change -= diff
-                    if char_length is not None:
-                        dchar_change -= len(v) - len(k)
+            cleaned_text = rewritten
 
-                else:
-                    done.add(k)
+        if dword_change == 0 and dchar_change == 0:
+            return cleaned_text
 
         # Synonyms and spellings for char count
         for word in self.nlp(cleaned_text):
             if dword_change == 0 and dchar_change == 0:
-                print('c', dword_change)
                 return cleaned_text
 
             while dchar_change != 0 and cleaned_text.find(space(word.orth_)) != -1:
@@ -282,7 +314,6 @@ class SpreadShredProcessor(Processor):
                 cleaned_text = cleaned_text.replace(
                     space(word.orth_), space(repl), 1)
 
-        print('d', dword_change)
         return cleaned_text
 
 
@@ -0,0 +1,108 @@
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Tuple
+
+from ..util import word_count
+
+
+# Aho-Corasick automaton over whitespace separated tokens, so every pattern
+# only ever matches whole words
+class PatternMatcher:
+    def __init__(self, patterns: Dict[str, str]):
+        self.patterns = patterns
+
+        self.priority: Dict[str, int] = {}
+        self.diffs: Dict[str, int] = {}
+
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[Tuple[str, int]]] = [[]]
+
+        for i, (k, v) in enumerate(patterns.items()):
+            tokens = k.split()
+
+            if len(tokens) == 0:
+                continue
+
+            self.priority[k] = i
+            if v == '':
+                self.diffs[k] = -word_count(k)
+            else:
+                self.diffs[k] = word_count(v) - word_count(k)
+
+            state = 0
+            for token in tokens:
+                if token not in self.goto[state]:
+                    self.goto[state][token] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+
+                state = self.goto[state][token]
+
+            self.output[state].append((k, len(tokens)))
+
+        queue: Deque[int] = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+
+            for token, child in self.goto[state].items():
+                queue.append(child)
+
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+
+                self.fail[child] = self.goto[fallback].get(token, 0)
+
+                self.output[child] = (self.output[child] +
+                                      self.output[self.fail[child]])
+
+    def find(self, tokens: List[str]) -> Iterator[Tuple[int, int, str]]:
+        state = 0
+
+        for i, token in enumerate(tokens):
+            while state and token not in self.goto[state]:
+                state = self.fail[state]
+
+            state = self.goto[state].get(token, 0)
+
+            for k, length in self.output[state]:
+                yield (i + 1 - length, i + 1, k)
+
+    def rewrite(self, text: str, dword_change: int, dchar_change: int = 0,
+                count_chars: bool = False) -> Tuple[str, int, int]:
+        tokens = text.split(' ')
+
+        sites = sorted(self.find(tokens),
+                       key=lambda x: (x[0], self.priority[x[2]]))
+
+        result: List[str] = []
+        pos = 0
+        for start, end, k in sites:
+            if dword_change == 0:
+                break
+
+            if start < pos:
+                continue
+
+            diff = self.diffs[k]
+            if abs(dword_change - diff) >= abs(dword_change):
+                continue
+
+            v = self.patterns[k]
+
+            result.extend(tokens[pos:start])
+            if v != '':
+                result.append(v)
+            pos = end
+
+            dword_change -= diff
+            if count_chars:
+                dchar_change -= len(v) - len(k)
+
+        if pos == 0:
+            return (text, dword_change, dchar_change)
+
+        result.extend(tokens[pos:])
+
+        return (' '.join(result), dword_change, dchar_change)
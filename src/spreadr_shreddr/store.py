@@ -0,0 +1,115 @@
+import json
+import os
+import sqlite3
+from os import path
+from typing import Dict, Iterator, List, Optional
+
+import yaml
+
+from ..cache import transaction
+
+
+class SynonymStore:
+    def __init__(self, file_name: str = 'src/syns.sqlite3',
+                 batch_size: int = 100):
+        self.file_name = file_name
+        self.batch_size = batch_size
+
+        self.pending: Dict[str, Optional[List[str]]] = {}
+
+        directory = path.dirname(file_name)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(file_name, timeout=60,
+                                    isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA mmap_size=268435456')
+
+        with transaction(self.conn):
+            self.conn.execute(
+                'CREATE TABLE IF NOT EXISTS synonyms ('
+                'key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID')
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.pending or self.conn.execute(
+            'SELECT 1 FROM synonyms WHERE key = ?',
+            (key,)).fetchone() is not None
+
+    def __getitem__(self, key: str) -> Optional[List[str]]:
+        if key in self.pending:
+            return self.pending[key]
+
+        row = self.conn.execute(
+            'SELECT value FROM synonyms WHERE key = ?', (key,)).fetchone()
+
+        if row is None:
+            raise KeyError(key)
+
+        return None if row[0] is None else json.loads(row[0])
+
+    def __setitem__(self, key: str, value: Optional[List[str]]):
+        self.pending[key] = value
+
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def __len__(self) -> int:
+        self.flush()
+
+        return self.conn.execute('SELECT COUNT(*) FROM synonyms').fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        self.flush()
+
+        return (row[0] for row in self.conn.execute(
+            'SELECT key FROM synonyms'))
+
+    def get(self, key: str,
+            default: Optional[List[str]] = None) -> Optional[List[str]]:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def update(self, synonyms: Dict[str, Optional[List[str]]]):
+        self.pending.update(synonyms)
+
+        self.flush()
+
+    def flush(self):
+        if len(self.pending) == 0:
+            return
+
+        with transaction(self.conn):
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO synonyms VALUES (?, ?)',
+                ((k, None if v is None else json.dumps(v))
+                 for k, v in self.pending.items()))
+
+        self.pending.clear()
+
+    def import_yaml(self, file_name: str):
+        with open(file_name, 'r') as f:
+            synonyms = yaml.load(f, Loader=getattr(
+                yaml, 'CSafeLoader', yaml.SafeLoader))
+
+        if synonyms:
+            self.update(synonyms)
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def main():
+    store = SynonymStore()
+    store.import_yaml('src/syns.yaml')
+
+    print('Imported {} synonyms'.format(len(store)))
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
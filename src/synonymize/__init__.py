@@ -1,21 +1,44 @@
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import random
 import re
 from collections import defaultdict
-from typing import Dict, List
+from os import path
+from typing import Dict, Iterator, List, Optional
 
 import markovify
 import nltk
-import requests
-import spacy
 from cytoolz.functoolz import pipe
 from nltk.corpus import wordnet as wn
 from textacy.preprocessing import (normalize_hyphenated_words,
                                    normalize_quotation_marks,
                                    normalize_unicode, normalize_whitespace)
-from tracery import Grammar
 from tracery.modifiers import base_english
 
 from ..abstracts import Generator
-from ..util import UNIVERSAL_TO_LETTER, word_count
+from ..grammar import CompiledGrammar
+from ..muse import DATAMUSE
+from ..nlp import Pipeline, load_model
+from ..util import UNIVERSAL_TO_LETTER
+from .chain import CompiledChain
+
+MODEL_FILE = 'cache/synonymize.json.gz'
+MODEL_VERSION = 1
+
+# The model owned by a generation worker, inherited from the parent on fork
+_MODEL: Optional['POSifiedText'] = None
+
+
+def _generate_part(task) -> str:
+    length, seed, kwargs = task
+
+    assert _MODEL is not None
+
+    return _MODEL.sentence_join(_MODEL.generate_sentences(
+        length, rng=random.Random(seed), **kwargs))
 
 
 class POSifiedText(markovify.Text, Generator):
@@ -23,10 +46,16 @@ class POSifiedText(markovify.Text, Generator):
     clean_pattern = re.compile(r'[\n_]')
     tracery_pattern = re.compile(r'^#.+#$')
 
+    chain: CompiledChain
+
     def __init__(self, input_text: str, state_size: int = 2):
+        self.corpus_hash = self.hash_corpus(input_text)
+
         nltk.download('brown')
         nltk.download('gutenberg')
-        self.nlp = spacy.load('en_core_web_lg')
+        self._nlp: Optional[Pipeline] = load_model(
+            'en_core_web_lg', 'tagger+ner')
+        self.api = DATAMUSE()
 
         self.synonyms: Dict[str, List[str]] = defaultdict(list)
         self.entities: Dict[str, List[str]] = defaultdict(list)
@@ -43,20 +72,125 @@ class POSifiedText(markovify.Text, Generator):
 
         markovify.Text.__init__(
             self, input_text, state_size, retain_original=False)
+        self.chain = CompiledChain.from_chain(self.chain)
+
+        self.build_grammar()
+
+    # Loaded models skip spaCy until a sentence has to be split again, e.g.
+    # by make_sentence_with_start
+    @property
+    def nlp(self) -> Pipeline:
+        if self._nlp is None:
+            self._nlp = load_model('en_core_web_lg', 'tagger+ner')
 
-        self.grammar = Grammar({**self.synonyms, **self.entities})
+        return self._nlp
+
+    @staticmethod
+    def hash_corpus(input_text: str) -> str:
+        return hashlib.sha1(input_text.encode('utf-8')).hexdigest()
+
+    def build_grammar(self):
+        self.grammar = CompiledGrammar({**self.synonyms, **self.entities})
         self.grammar.add_modifiers(base_english)
 
+    def save(self, file_name: str = MODEL_FILE):
+        model = {
+            'version': MODEL_VERSION,
+            'corpus': self.corpus_hash,
+            'state_size': self.state_size,
+            'chain': list(self.chain.model.items()),
+            'synonyms': self.synonyms,
+            'entities': self.entities
+        }
+
+        os.makedirs(path.dirname(file_name) or '.', exist_ok=True)
+
+        with gzip.open(file_name + '.tmp', 'wt', encoding='utf-8') as f:
+            json.dump(model, f, separators=(',', ':'))
+
+        os.replace(file_name + '.tmp', file_name)
+
+    # Restores a saved model without spaCy or Datamuse; raises ValueError if
+    # the file was written by another version or, given the corpus, if it
+    # was trained on different text
+    @classmethod
+    def load(cls, file_name: str = MODEL_FILE,
+             input_text: Optional[str] = None) -> 'POSifiedText':
+        with gzip.open(file_name, 'rt', encoding='utf-8') as f:
+            model = json.load(f)
+
+        if model.get('version') != MODEL_VERSION:
+            raise ValueError('{} has model version {}, expected {}'.format(
+                file_name, model.get('version'), MODEL_VERSION))
+
+        if (input_text is not None and
+                model['corpus'] != cls.hash_corpus(input_text)):
+            raise ValueError('{} is stale for this corpus'.format(file_name))
+
+        self = cls.__new__(cls)
+        self.corpus_hash = model['corpus']
+        self._nlp = None
+        self.api = DATAMUSE()
+
+        self.well_formed = True
+        self.retain_original = False
+        self.state_size = model['state_size']
+        self.chain = CompiledChain.from_json(model['chain'])
+
+        self.synonyms = defaultdict(list, model['synonyms'])
+        self.entities = defaultdict(list, model['entities'])
+
+        self.build_grammar()
+
+        return self
+
+    @classmethod
+    def load_or_train(cls, input_text: str, state_size: int = 2,
+                      file_name: str = MODEL_FILE) -> 'POSifiedText':
+        if path.isfile(file_name):
+            try:
+                model = cls.load(file_name, input_text)
+
+                if model.state_size == state_size:
+                    return model
+            except ValueError:
+                pass
+
+        model = cls(input_text, state_size)
+        model.save(file_name)
+
+        return model
+
     def sentence_join(self, sentences):
         return " ".join(sentences)
 
+    # Tags every sentence in one pipe and prefetches the synonyms of all its
+    # nouns and verbs before the tokens are built
+    def generate_corpus(self, text):
+        if isinstance(text, str):
+            sentences = self.sentence_split(text)
+        else:
+            sentences = [x for line in text for x in self.sentence_split(line)]
+
+        docs = list(self.nlp.pipe(
+            filter(self.test_sentence_input, sentences), batch_size=256))
+
+        self.api.prefetch(word.orth_ for doc in docs for word in doc
+                          if word.pos_ in {'NOUN', 'VERB'} and
+                          word.orth_ not in self.synonyms)
+
+        return map(self.doc_split, docs)
+
     def word_split(self, sentence):
+        return self.doc_split(self.nlp(sentence))
+
+    def doc_split(self, doc):
         tokenized = []
         first = True
         entity = False
 
         entity_construct = {"tag": "", "type": "", "words": []}
-        for word in self.nlp(sentence):
+        for word in doc:
             default = True
 
             if word.ent_iob_ == "B":
@@ -78,14 +212,12 @@ class POSifiedText(markovify.Text, Generator):
                 modifiers = []
 
                 if word.orth_ not in self.synonyms:
-                    r = requests.get('https://api.datamuse.com/words', params={
-                        'ml': word.orth_
-                    })
+                    res = self.api.words(ml=word.orth_)
 
                     syns = []
-                    if len(r.json()) > 0:
+                    if len(res) > 0:
                         syns = [
-                            obj['word'] for obj in r.json()
+                            obj['word'] for obj in res
                             if 'syn' in obj['tags'] and
                             UNIVERSAL_TO_LETTER[word.pos_] in obj['tags'] and
                             'prop' not in obj['tags']]
@@ -132,28 +264,81 @@ class POSifiedText(markovify.Text, Generator):
         sentence = []
         for word in words:
             (word, _) = word.split(self.separator)
-            sentence.append(self.grammar.flatten(word))
-
-        return " ".join(sentence).replace('_', ' ')
+            if '#' in word:
+                word = self.grammar.flatten(word)
 
-    def generate_text(self, **kwargs) -> str:
-        length = kwargs.get('length', 50000)
+            sentence.append(word)
 
-        text = ''
-        w_count = 0
-
-        while w_count < length:
-            sent = self.make_sentence()
-            text += sent
-            w_count += word_count(sent)
-
-        return text
-
-    def save_to_file(self, file_name: str, length: int = 50000):
-        text = self.generate_text(length=length)
+        return " ".join(sentence).replace('_', ' ')
 
-        with open(file_name, 'w') as f:
-            f.write(text)
+    # With `rng`, the chain walk and the grammar draw from it instead of the
+    # global random state while the sentences are generated
+    def generate_sentences(self, length: int, tries: int = 10,
+                           max_failures: int = 100,
+                           rng: Optional[random.Random] = None
+                           ) -> Iterator[str]:
+        if rng is not None:
+            self.chain.rng = rng
+            self.grammar.rng = rng
+
+        try:
+            w_count = 0
+            failures = 0
+
+            while w_count < length:
+                sent = self.make_sentence(tries=tries)
+
+                if sent is None:
+                    failures += 1
+                    if failures >= max_failures:
+                        raise RuntimeError(
+                            'No sentence after {} attempts'.format(failures))
+                    continue
+
+                failures = 0
+                w_count += len(sent.split())
+
+                yield sent
+        finally:
+            if rng is not None:
+                del self.chain.rng
+                del self.grammar.rng
+
+    def stream(self, **kwargs) -> Iterator[str]:
+        global _MODEL
+
+        length = kwargs.pop('length', 50000)
+        workers = kwargs.pop('workers', 1)
+        seed = kwargs.pop('seed', None)
+        part_length = kwargs.pop('part_length', 1000)
+
+        if workers <= 1:
+            sentences = self.generate_sentences(
+                length, rng=None if seed is None else random.Random(seed),
+                **kwargs)
+            for i, sent in enumerate(sentences):
+                yield ' ' + sent if i else sent
+
+            return
+
+        # The budget is cut into small parts, each with its own seed, so
+        # output streams in order without holding a worker's whole share
+        rng = random.Random(seed)
+        tasks = [(min(part_length, length - start), rng.getrandbits(64),
+                  kwargs) for start in range(0, length, part_length)]
+
+        # The model holds spaCy and HTTP state that does not pickle, so
+        # workers get it by forking rather than through the task queue
+        _MODEL = self
+        try:
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                for i, part in enumerate(pool.imap(_generate_part, tasks)):
+                    yield ' ' + part if i else part
+        finally:
+            _MODEL = None
+
+    def save_to_file(self, file_name: str, length: int = 50000, **kwargs):
+        self.write_to_file(file_name, length=length, **kwargs)
 
 
 def main():
@@ -161,7 +346,7 @@ def main():
     # corpus = '\n'.join([' '.join(s) for s in brown.sents()])
     text = open('src/synonymize/hounds_sherlock.txt').read().replace('_', ' ')
 
-    bot = POSifiedText(text)
+    bot = POSifiedText.load_or_train(text)
 
     try:
         while True:
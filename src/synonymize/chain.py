@@ -0,0 +1,34 @@
+import bisect
+import random
+from itertools import accumulate
+from typing import Dict, Tuple, cast
+
+import markovify
+
+
+# A markovify chain whose transition tables are turned into (choices,
+# cumulative weights) once, so each step is a single bisect instead of
+# rebuilding both lists from the model dict. Steps draw from `rng`, the
+# global random module unless an instance is given its own generator.
+class CompiledChain(markovify.Chain):
+    # The module's functions share one hidden Random instance
+    rng: random.Random = cast(random.Random, random)
+
+    def __init__(self, corpus, state_size: int, model=None):
+        markovify.Chain.__init__(self, corpus, state_size, model=model)
+
+        self.compiled: Dict[Tuple[str, ...], Tuple[Tuple[str, ...],
+                                                   Tuple[int, ...]]] = {
+            state: (tuple(follow), tuple(accumulate(follow.values())))
+            for state, follow in self.model.items()
+        }
+
+    @classmethod
+    def from_chain(cls, chain: markovify.Chain) -> 'CompiledChain':
+        return cls(None, chain.state_size, model=chain.model)
+
+    def move(self, state):
+        choices, cumdist = self.compiled[state]
+
+        return choices[bisect.bisect(
+            cumdist, self.rng.random() * cumdist[-1])]
@@ -1,13 +1,13 @@
 import datetime
 import re
-from typing import FrozenSet, cast
+import time
+from functools import lru_cache
+from typing import (Dict, FrozenSet, Hashable, Iterator, List, Optional,
+                    Sequence, Tuple, cast)
 
-from nltk.corpus import stopwords
-from nltk.corpus import wordnet as wn
-from spacy.lang.en.stop_words import STOP_WORDS
-from sumy.utils import get_stop_words as getsw
+import numpy as np
 
-import spacy
+from .nlp import Pipeline, load_model
 
 PENN_TO_UNIVERSAL = {
     '#': 'SYM',
@@ -60,10 +60,10 @@ PENN_TO_UNIVERSAL = {
 }
 
 UNIVERSAL_TO_LETTER = {
-    "ADJ": wn.ADJ,
-    "ADV": wn.ADV,
-    "NOUN": wn.NOUN,
-    "VERB": wn.VERB
+    "ADJ": 'a',
+    "ADV": 'r',
+    "NOUN": 'n',
+    "VERB": 'v'
 }
 
 UNIVERSAL_TO_DATAMUSE = {
@@ -75,14 +75,50 @@ UNIVERSAL_TO_DATAMUSE = {
 
 WHITESPACE_PATTERN = re.compile(r'\s+')
 
-WORD2VEC = spacy.load('en_vectors_web_lg')
+
+# An NLTK corpus reader, downloading the corpus on first use
+@lru_cache()
+def NLTK_CORPUS(name: str):
+    import nltk
+
+    try:
+        nltk.data.find('corpora/{}'.format(name))
+    except LookupError:
+        nltk.download(name)
+
+    return getattr(nltk.corpus, name)
+
+
+@lru_cache()
+def WORD2VEC() -> Pipeline:
+    return load_model('en_vectors_web_lg')
 
 
 def word_count(text: str) -> int:
     return len(WHITESPACE_PATTERN.split(text))
 
 
+def read_paragraphs(file_name: str) -> Iterator[str]:
+    with open(file_name) as f:
+        paragraph: List[str] = []
+
+        for line in f:
+            if line.strip() == '':
+                if len(paragraph) > 0:
+                    yield ''.join(paragraph)
+                    paragraph = []
+            else:
+                paragraph.append(line)
+
+        if len(paragraph) > 0:
+            yield ''.join(paragraph)
+
+
 def get_stop_words(lang: str) -> FrozenSet[str]:
+    from nltk.corpus import stopwords
+    from spacy.lang.en.stop_words import STOP_WORDS
+    from sumy.utils import get_stop_words as getsw
+
     tmp = list(stopwords.words(lang))
     tmp.extend(getsw(lang))
 
@@ -92,18 +128,62 @@ def get_stop_words(lang: str) -> FrozenSet[str]:
     return cast(FrozenSet[str], frozenset(tmp))
 
 
-# https://stackoverflow.com/questions/20193555/finding-combinations-to-the-provided-sum-value
-def list_sums(lst, target, with_replacement=False):
-    def _a(idx, l, r, t, w):
-        if t == sum(x[1] for x in l):
-            r.append(l)
-        elif t < sum(x[1] for x in l):
-            return []
-        for u in range(idx, len(lst)):
-            _a(u if w else (u + 1), l + [(u, lst[u])], r, t, w)
-        return r
-    return _a(0, [], [], target, with_replacement)
+# Minimum-cardinality subset sum: for every reachable sum keep only the
+# smallest combination reaching it, as a linked chain of indices. Values
+# sharing a group id are alternatives, so at most one of them is taken.
+def min_subset_sum(values: Sequence[int], target: int,
+                   groups: Optional[Sequence[Hashable]] = None,
+                   max_states: int = 1000000,
+                   timeout: Optional[float] = None) -> Optional[List[int]]:
+    deadline = None if timeout is None else time.perf_counter() + timeout
+
+    members: Dict[Hashable, List[int]] = {}
+    for i in range(len(values)):
+        members.setdefault(i if groups is None else groups[i], []).append(i)
+
+    best: Dict[int, Tuple[int, Optional[tuple]]] = {0: (0, None)}
+    for group in members.values():
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+
+        # Every value of a group extends only the sums reached before it
+        previous = list(best.items())
+        for i in group:
+            value = values[i]
+            if value == 0:
+                continue
+
+            for total, (count, chain) in previous:
+                new_total = total + value
+
+                if new_total in best:
+                    if best[new_total][0] <= count + 1:
+                        continue
+                elif len(best) >= max_states:
+                    continue
+
+                best[new_total] = (count + 1, (i, chain))
+
+    if target not in best:
+        return None
+
+    indices: List[int] = []
+    chain = best[target][1]
+    while chain is not None:
+        indices.append(chain[0])
+        chain = chain[1]
+
+    return indices[::-1]
 
 
 def word_similarity(word1: str, word2: str) -> float:
-    return WORD2VEC(word1).similarity(word2)
+    return WORD2VEC()(word1).similarity(WORD2VEC()(word2))
+
+
+def word_vectors(words: Sequence[str]) -> np.ndarray:
+    vectors = np.array([doc.vector for doc in WORD2VEC().pipe(words)])
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+
+    return vectors / norms
@@ -0,0 +1,111 @@
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import path
+from urllib.parse import parse_qs, urlparse
+
+from src.cache import PersistentCache
+from src.muse import CachedDatamuse
+
+
+# Local stand-in for the Datamuse API: answers /words with the query echoed
+# back, slowly enough that concurrent requests overlap, and records when each
+# request arrived
+class StubDatamuse(BaseHTTPRequestHandler):
+    delay = .1
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        with self.server.lock:
+            self.server.requests.append((time.perf_counter(), query))
+
+        time.sleep(self.delay)
+
+        body = json.dumps([{'word': query.get('ml', ''), 'score': 1}])
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode('utf-8'))
+
+    def log_message(self, *args):
+        pass
+
+
+class CachedDatamuseTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubDatamuse)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+
+        self.directory = tempfile.mkdtemp()
+        self.cache = PersistentCache(
+            path.join(self.directory, 'datamuse.sqlite3'))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.cache.close()
+        shutil.rmtree(self.directory)
+
+    def client(self, **kwargs) -> CachedDatamuse:
+        api = CachedDatamuse(
+            cache=self.cache, api_root='http://127.0.0.1:{}'.format(
+                self.server.server_port), **kwargs)
+        self.addCleanup(api.close)
+
+        return api
+
+    def test_coalesces_in_flight_queries(self):
+        api = self.client()
+
+        res = api.words_many([{'ml': 'dog'}] * 5 + [{'ml': 'cat'}])
+
+        self.assertEqual([x[0]['word'] for x in res], ['dog'] * 5 + ['cat'])
+        self.assertEqual(sorted(x['ml'] for _, x in self.server.requests),
+                         ['cat', 'dog'])
+
+    def test_cached_results_are_not_refetched(self):
+        api = self.client()
+
+        first = api.words_many([{'ml': 'dog'}])
+        second = api.words_many([{'ml': 'dog'}])
+
+        self.assertEqual(first, second)
+        self.assertEqual(api.words(ml='dog'), first[0])
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_rate_limit(self):
+        api = self.client(rate_limit=20)
+
+        api.words_many({'ml': 'word{}'.format(i)} for i in range(10))
+
+        times = sorted(x for x, _ in self.server.requests)
+
+        self.assertEqual(len(times), 10)
+        # 10 requests at 20 per second: the last starts 9 intervals after
+        # the first
+        self.assertGreaterEqual(times[-1] - times[0], 9 / 20 - .05)
+
+    def test_concurrency_limit(self):
+        api = self.client(concurrency=2)
+
+        start = time.perf_counter()
+        api.words_many({'ml': 'word{}'.format(i)} for i in range(4))
+
+        # Two at a time, each taking StubDatamuse.delay
+        self.assertGreaterEqual(time.perf_counter() - start,
+                                2 * StubDatamuse.delay)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from src.util import min_subset_sum
+
+
+class MinSubsetSumTest(unittest.TestCase):
+    def test_negative_values(self):
+        values = [-3, 5, -4, -2, -7]
+
+        combination = min_subset_sum(values, -7)
+
+        self.assertEqual(combination, [4])
+
+    def test_fewest_values(self):
+        values = [-1, -2, -3, -4, -6]
+
+        combination = min_subset_sum(values, -9)
+
+        self.assertEqual(sum(values[i] for i in combination), -9)
+        self.assertEqual(len(combination), 2)
+
+    def test_unreachable_target(self):
+        self.assertIsNone(min_subset_sum([-2, -4, 6], -5))
+        self.assertIsNone(min_subset_sum([], -1))
+
+    def test_zero_target(self):
+        self.assertEqual(min_subset_sum([-2, 2], 0), [])
+
+    def test_one_value_per_group(self):
+        values = [-3, -4, -2]
+        groups = ['a', 'a', 'b']
+
+        self.assertEqual(min_subset_sum(values, -7), [0, 1])
+        # -3 + -4 would reach it, but both summarise paragraph 'a'
+        self.assertIsNone(min_subset_sum(values, -7, groups=groups))
+        self.assertEqual(min_subset_sum(values, -6, groups=groups), [1, 2])
+
+    def test_max_states(self):
+        values = [-1, -2, -4, -8]
+
+        self.assertEqual(min_subset_sum(values, -15), [0, 1, 2, 3])
+        # Only the empty sum and one more fit, so -15 is never reached
+        self.assertIsNone(min_subset_sum(values, -15, max_states=2))
+
+    def test_timeout(self):
+        values = [-1] * 10
+
+        self.assertEqual(len(min_subset_sum(values, -10)), 10)
+        self.assertIsNone(min_subset_sum(values, -10, timeout=-1))
+
+
+if __name__ == '__main__':
+    unittest.main()